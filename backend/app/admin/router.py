@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from db.database import get_db
-from app.admin.schemas import SystemMetrics, SlotUtilization, BulkSlotCreate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from db.database import DbSession, get_session, run_db, run_unit_of_work
+from app.admin.schemas import SystemMetrics, SlotUtilization, BulkSlotCreate, BulkSlotJob, SlotCacheStats, PredictionCacheStats
 from app.admin.service import AdminService
 from app.slots.service import SlotService
+from app.slots.bulk import slot_bulk_creator
+from app.slots.cache import slot_cache
+from app.prediction.cache import prediction_cache
+from app.services.service import ServiceService
 from app.auth.dependencies import require_admin
 from db.models import User
+from core.config import settings
+from core.pagination import set_page_headers
+from typing import Optional
 from datetime import date, time as dt_time
 
 router = APIRouter()
@@ -13,28 +19,53 @@ router = APIRouter()
 @router.get("/metrics", response_model=SystemMetrics)
 async def get_system_metrics(
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get live system metrics (Admin only)."""
-    return AdminService.get_system_metrics(db)
+    return await run_db(db, AdminService.get_system_metrics)
 
 @router.get("/slot-utilization", response_model=list[SlotUtilization])
 async def get_slot_utilization(
+    response: Response,
     start_date: date = Query(...),
     end_date: date = Query(...),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
-    """Get slot utilization report (Admin only)."""
-    return AdminService.get_slot_utilization(db, start_date, end_date)
+    """Get slot utilization report, paged by X-Next-Cursor (Admin only)."""
+    rows, next_cursor, estimated_total = await run_db(
+        db, AdminService.get_slot_utilization, start_date, end_date, cursor, limit
+    )
+    set_page_headers(response, next_cursor, estimated_total)
+    return rows
+
+@router.get("/slot-cache", response_model=SlotCacheStats)
+async def get_slot_cache_stats(
+    current_user: User = Depends(require_admin)
+):
+    """Get slot availability cache hit/miss counters (Admin only)."""
+    return slot_cache.stats()
+
+@router.get("/prediction-cache", response_model=PredictionCacheStats)
+async def get_prediction_cache_stats(
+    current_user: User = Depends(require_admin)
+):
+    """Get prediction cache hit/miss counters and snapshot backlog (Admin only)."""
+    return prediction_cache.stats()
 
 @router.post("/slots/bulk-create")
 async def bulk_create_slots(
     bulk_data: BulkSlotCreate,
+    response: Response,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
-    """Bulk create slots for a date range (Admin only)."""
+    """
+    Bulk create slots for a date range (Admin only).
+    Large ranges run as a background job; poll /slots/bulk-create/{job_id} for progress.
+    """
     # Convert string times to time objects
     time_slots = []
     for start_str, end_str in bulk_data.time_slots:
@@ -42,8 +73,23 @@ async def bulk_create_slots(
         end_time = dt_time.fromisoformat(end_str)
         time_slots.append((start_time, end_time))
     
-    slots = SlotService.bulk_create_slots(
-        db=db,
+    total = SlotService.count_slot_rows(bulk_data.start_date, bulk_data.end_date, time_slots)
+    if total > settings.SLOT_BULK_BACKGROUND_THRESHOLD:
+        await run_db(db, ServiceService.get_service_by_id, bulk_data.service_id)
+        job = slot_bulk_creator.start(
+            service_id=bulk_data.service_id,
+            start_date=bulk_data.start_date,
+            end_date=bulk_data.end_date,
+            time_slots=time_slots,
+            capacity=bulk_data.capacity,
+            created_by=current_user.id
+        )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"message": f"Creating {total} slots in the background", "job_id": job["job_id"], "total": total}
+    
+    created = await run_unit_of_work(
+        db,
+        SlotService.bulk_create_slots,
         service_id=bulk_data.service_id,
         start_date=bulk_data.start_date,
         end_date=bulk_data.end_date,
@@ -52,4 +98,18 @@ async def bulk_create_slots(
         created_by=current_user.id
     )
     
-    return {"message": f"Created {len(slots)} slots successfully", "count": len(slots)}
+    return {"message": f"Created {created} slots successfully", "count": created}
+
+@router.get("/slots/bulk-create/{job_id}", response_model=BulkSlotJob)
+async def get_bulk_create_job(
+    job_id: int,
+    current_user: User = Depends(require_admin)
+):
+    """Get the progress of a background bulk slot creation (Admin only)."""
+    job = slot_bulk_creator.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bulk creation job not found"
+        )
+    return job
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from datetime import date, time
+from datetime import date, datetime, time
+from typing import Optional
 
 class BulkSlotCreate(BaseModel):
     service_id: int
@@ -8,6 +9,32 @@ class BulkSlotCreate(BaseModel):
     time_slots: list[tuple[str, str]]  # [(start_time, end_time), ...]
     capacity: int
 
+class BulkSlotJob(BaseModel):
+    job_id: int
+    service_id: int
+    status: str  # RUNNING, COMPLETED, FAILED, CANCELLED
+    total: int
+    processed: int
+    created: int  # Rows inserted; processed - created already existed
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+class SlotCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    cached_days: int
+    cached_slots: int
+    version: int
+
+class PredictionCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    cached_predictions: int
+    pending_snapshot: int
+
 class SystemMetrics(BaseModel):
     total_users: int
     total_appointments: int
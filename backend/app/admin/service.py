@@ -2,7 +2,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from db.models import User, Appointment, Slot, Service
 from app.admin.schemas import SystemMetrics, SlotUtilization
+from core.pagination import keyset_page, estimate_count
 from datetime import datetime, date
+from typing import Optional, Tuple
 
 class AdminService:
     """Service for admin operations."""
@@ -51,13 +53,16 @@ class AdminService:
     def get_slot_utilization(
         db: Session,
         start_date: date,
-        end_date: date
-    ) -> list[SlotUtilization]:
-        """Get slot utilization report."""
-        slots = db.query(Slot).filter(
+        end_date: date,
+        cursor: str = None,
+        limit: int = 500
+    ) -> Tuple[list[SlotUtilization], Optional[str], int]:
+        """Get a page of the slot utilization report. Returns (rows, next_cursor, estimated_total)."""
+        query = db.query(Slot).filter(
             Slot.date >= start_date,
             Slot.date <= end_date
-        ).all()
+        )
+        slots, next_cursor = keyset_page(query, (Slot.date, Slot.start_time, Slot.id), cursor, limit)
         
         utilization_data = []
         for slot in slots:
@@ -73,4 +78,4 @@ class AdminService:
                 status=slot.status
             ))
         
-        return utilization_data
+        return utilization_data, next_cursor, estimate_count(db, query)
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from db.database import get_db
+from db.database import DbSession, get_session, run_db
 from app.analytics.schemas import (
     AnalyticsOverview,
     ServicePerformance,
@@ -20,7 +19,7 @@ async def get_analytics_overview(
     start_date: date = Query(None),
     end_date: date = Query(None),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get analytics overview (Admin only)."""
     if not start_date:
@@ -28,14 +27,14 @@ async def get_analytics_overview(
     if not end_date:
         end_date = date.today()
     
-    return AnalyticsService.get_analytics_overview(db, start_date, end_date)
+    return await run_db(db, AnalyticsService.get_analytics_overview, start_date, end_date)
 
 @router.get("/service-performance", response_model=list[ServicePerformance])
 async def get_service_performance(
     start_date: date = Query(None),
     end_date: date = Query(None),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get service performance metrics (Admin only)."""
     if not start_date:
@@ -43,24 +42,24 @@ async def get_service_performance(
     if not end_date:
         end_date = date.today()
     
-    return AnalyticsService.get_service_performance(db, start_date, end_date)
+    return await run_db(db, AnalyticsService.get_service_performance, start_date, end_date)
 
 @router.get("/daily-stats", response_model=list[DailyStats])
 async def get_daily_stats(
     start_date: date = Query(...),
     end_date: date = Query(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get daily statistics (Admin only)."""
-    return AnalyticsService.get_daily_stats(db, start_date, end_date)
+    return await run_db(db, AnalyticsService.get_daily_stats, start_date, end_date)
 
 @router.get("/export/service-performance")
 async def export_service_performance(
     start_date: date = Query(None),
     end_date: date = Query(None),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Export service performance to CSV (Admin only)."""
     if not start_date:
@@ -68,7 +67,7 @@ async def export_service_performance(
     if not end_date:
         end_date = date.today()
     
-    data = AnalyticsService.get_service_performance(db, start_date, end_date)
+    data = await run_db(db, AnalyticsService.get_service_performance, start_date, end_date)
     csv_content = AnalyticsService.export_to_csv(data)
     
     return StreamingResponse(
@@ -82,10 +81,10 @@ async def export_daily_stats(
     start_date: date = Query(...),
     end_date: date = Query(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Export daily stats to CSV (Admin only)."""
-    data = AnalyticsService.get_daily_stats(db, start_date, end_date)
+    data = await run_db(db, AnalyticsService.get_daily_stats, start_date, end_date)
     csv_content = AnalyticsService.export_to_csv(data)
     
     return StreamingResponse(
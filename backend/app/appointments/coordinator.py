@@ -0,0 +1,109 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from db.database import run_in_session
+from db.models import Appointment, IdempotencyRecord
+from app.appointments.schemas import AppointmentCreate, AppointmentResponse
+from app.appointments.service import AppointmentService
+from core.config import settings
+from core.idempotency import idempotency_store
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+class BookingCoordinator:
+    """Group-commits concurrent bookings for the same slot.
+
+    Requests for a slot are collected for BOOKING_BATCH_WINDOW_MS (or until
+    BOOKING_BATCH_MAX_SIZE is reached) and booked together in a single
+    transaction. Each caller still receives its own appointment or error.
+    Replay records for Idempotency-Key requests commit in the same
+    transaction as their bookings.
+    """
+
+    def __init__(self):
+        # slot_id -> [(user_id, booking, idempotency key, fingerprint, future)]
+        self.pending: Dict[int, List[Tuple[int, AppointmentCreate, Optional[str], Optional[str], asyncio.Future]]] = {}
+        self.timers: Dict[int, asyncio.TimerHandle] = {}
+
+    async def submit(
+        self,
+        user_id: int,
+        appointment_data: AppointmentCreate,
+        idempotency_key: Optional[str] = None,
+        fingerprint: Optional[str] = None
+    ) -> Appointment:
+        """Queue a booking and wait for its batch to commit."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        slot_id = appointment_data.slot_id
+
+        batch = self.pending.setdefault(slot_id, [])
+        batch.append((user_id, appointment_data, idempotency_key, fingerprint, future))
+
+        if len(batch) >= settings.BOOKING_BATCH_MAX_SIZE:
+            await self.flush(slot_id)
+        elif slot_id not in self.timers:
+            self.timers[slot_id] = loop.call_later(
+                settings.BOOKING_BATCH_WINDOW_MS / 1000,
+                lambda: asyncio.ensure_future(self.flush(slot_id))
+            )
+
+        return await future
+
+    async def flush(self, slot_id: int) -> None:
+        """Book every pending request for a slot in one transaction."""
+        timer = self.timers.pop(slot_id, None)
+        if timer:
+            timer.cancel()
+        batch = self.pending.pop(slot_id, [])
+        if not batch:
+            return
+
+        try:
+            results = await run_in_session(
+                self.book,
+                [(user_id, data, key, fingerprint) for user_id, data, key, fingerprint, _ in batch]
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (*_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def book(db: Session, requests: List[Tuple[int, AppointmentCreate, Optional[str], Optional[str]]]) -> list:
+        """Book a batch of (user_id, booking, idempotency key, fingerprint) requests and stage their replay records."""
+        results: list = [None] * len(requests)
+        records: Dict[int, IdempotencyRecord] = {}
+        accepted = []
+        for index, (user_id, data, key, fingerprint) in enumerate(requests):
+            if key:
+                try:
+                    records[index] = idempotency_store.claim(db, user_id, key, fingerprint)
+                except HTTPException as e:
+                    results[index] = e
+                    continue
+            accepted.append(index)
+
+        booked = AppointmentService.book_many(db, [requests[index][:2] for index in accepted]) if accepted else []
+        for index, result in zip(accepted, booked):
+            results[index] = result
+            record = records.get(index)
+            if record is None:
+                continue
+            if isinstance(result, HTTPException):
+                # Rejected bookings are not replayed, same as outside batched mode
+                db.delete(record)
+            else:
+                idempotency_store.complete(
+                    db, record, status.HTTP_201_CREATED, AppointmentResponse.model_validate(result)
+                )
+        db.flush()
+        return results
+
+# Global booking coordinator instance
+booking_coordinator = BookingCoordinator()
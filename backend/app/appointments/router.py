@@ -1,58 +1,129 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from db.database import get_db
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from db.database import DbSession, get_session, run_db, run_unit_of_work
 from app.appointments.schemas import (
     AppointmentCreate,
     AppointmentResponse,
-    QueueStatus
+    QueueStatus,
+    BatchBookingRequest,
+    BatchBookingResponse
 )
 from app.appointments.service import AppointmentService
+from app.appointments.coordinator import booking_coordinator
 from app.auth.dependencies import get_current_user
 from db.models import User
+from core.config import settings
+from core.idempotency import idempotency_store
+from core.pagination import set_page_headers
+from typing import Optional
 
 router = APIRouter()
 
 @router.post("/book", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 async def book_appointment(
     appointment_data: AppointmentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
-    """Book a new appointment."""
-    return AppointmentService.book_appointment(db, current_user.id, appointment_data)
+    """Book a new appointment. Retries with the same Idempotency-Key replay the original response."""
+    fingerprint = f"book:{appointment_data.slot_id}:{appointment_data.service_id}"
+    if idempotency_key:
+        replayed = await run_db(db, idempotency_store.replay, current_user.id, idempotency_key, fingerprint)
+        if replayed:
+            return replayed
+        idempotency_store.begin(current_user.id, idempotency_key)
+    
+    def book(session):
+        response = AppointmentResponse.model_validate(
+            AppointmentService.book_appointment(session, current_user.id, appointment_data)
+        )
+        if idempotency_key:
+            idempotency_store.save(
+                session, current_user.id, idempotency_key, fingerprint, status.HTTP_201_CREATED, response
+            )
+        return response
+    
+    try:
+        if settings.BOOKING_MODE == "batched":
+            # The coordinator commits the booking and its replay record with its batch
+            response = AppointmentResponse.model_validate(
+                await booking_coordinator.submit(current_user.id, appointment_data, idempotency_key, fingerprint)
+            )
+        else:
+            # The booking and its replay record commit together
+            response = await run_unit_of_work(db, book)
+    finally:
+        if idempotency_key:
+            idempotency_store.release(current_user.id, idempotency_key)
+    return response
+
+@router.post("/book-batch", response_model=BatchBookingResponse, status_code=status.HTTP_201_CREATED)
+async def book_batch(
+    batch_data: BatchBookingRequest,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Book appointments for a group of users or guests in one transaction."""
+    return await run_unit_of_work(db, AppointmentService.book_batch, current_user, batch_data)
 
 @router.get("/my-bookings", response_model=list[AppointmentResponse])
 async def get_my_bookings(
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
-    """Get all bookings for current user."""
-    return AppointmentService.get_user_appointments(db, current_user.id)
+    """Get bookings for current user, newest first. Pass X-Next-Cursor back as cursor for older ones."""
+    appointments, next_cursor, estimated_total = await run_db(
+        db, AppointmentService.get_user_appointments, current_user.id, cursor, limit
+    )
+    set_page_headers(response, next_cursor, estimated_total)
+    return appointments
 
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
 async def get_appointment(
     appointment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get appointment by ID."""
-    return AppointmentService.get_appointment_by_id(db, appointment_id)
+    return await run_db(db, AppointmentService.get_appointment_by_id, appointment_id)
 
 @router.put("/{appointment_id}/cancel", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_appointment(
     appointment_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
-    """Cancel an appointment."""
-    AppointmentService.cancel_appointment(db, appointment_id, current_user.id)
+    """Cancel an appointment. Retries with the same Idempotency-Key replay the original response."""
+    fingerprint = f"cancel:{appointment_id}"
+    if idempotency_key:
+        replayed = await run_db(db, idempotency_store.replay, current_user.id, idempotency_key, fingerprint)
+        if replayed:
+            return replayed
+        idempotency_store.begin(current_user.id, idempotency_key)
+    
+    def cancel(session):
+        AppointmentService.cancel_appointment(session, appointment_id, current_user.id)
+        if idempotency_key:
+            idempotency_store.save(
+                session, current_user.id, idempotency_key, fingerprint, status.HTTP_204_NO_CONTENT
+            )
+    
+    try:
+        await run_unit_of_work(db, cancel)
+    finally:
+        if idempotency_key:
+            idempotency_store.release(current_user.id, idempotency_key)
     return None
 
 @router.get("/{appointment_id}/queue-status", response_model=QueueStatus)
 async def get_queue_status(
     appointment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get current queue status for an appointment."""
-    return AppointmentService.get_queue_status(db, appointment_id)
+    return await run_db(db, AppointmentService.get_queue_status, appointment_id)
@@ -12,6 +12,7 @@ class AppointmentResponse(BaseModel):
     slot_id: int
     service_id: int
     booking_reference: str
+    guest_name: Optional[str] = None
     status: str
     queue_position: Optional[int] = None
     estimated_wait_minutes: Optional[int] = None
@@ -33,3 +34,27 @@ class QueueStatus(BaseModel):
     total_in_queue: int
     estimated_wait_minutes: int
     status: str
+
+class GuestInfo(BaseModel):
+    name: str
+
+class BatchBookingEntry(BaseModel):
+    user_id: Optional[int] = None  # Defaults to the caller; other users require ADMIN
+    guest: Optional[GuestInfo] = None  # Booked under the caller's account
+    slot_id: int
+    service_id: int
+
+class BatchBookingRequest(BaseModel):
+    entries: list[BatchBookingEntry]
+    mode: str = "ALL_OR_NOTHING"  # ALL_OR_NOTHING, BEST_EFFORT
+
+class BatchBookingResult(BaseModel):
+    index: int
+    success: bool
+    appointment: Optional[AppointmentResponse] = None
+    error: Optional[str] = None
+
+class BatchBookingResponse(BaseModel):
+    booked: int
+    failed: int
+    results: list[BatchBookingResult]
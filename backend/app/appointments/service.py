@@ -1,20 +1,63 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update, case
 from fastapi import HTTPException, status
+from db.database import on_commit
 from db.models import Appointment, Slot, Service, User
-from app.appointments.schemas import AppointmentCreate, QueueStatus
+from app.appointments.schemas import (
+    AppointmentCreate,
+    AppointmentResponse,
+    QueueStatus,
+    BatchBookingRequest,
+    BatchBookingResponse,
+    BatchBookingResult
+)
 from app.slots.service import SlotService
+from app.slots.schedule import slot_schedule
+from app.slots.cache import slot_cache
+from app.queue.engine import queue_engine
+from app.counters.engine import dispatch_engine
+from app.queue.estimator import wait_estimator
+from app.events.bus import event_bus
+from core.config import settings
+from core.pagination import keyset_page, estimate_count
+from typing import List, Optional, Tuple
 import secrets
 import string
 
 class AppointmentService:
     """Service for appointment booking operations."""
     
+    # Sort key of a user's bookings (newest first), backed by ix_appointments_user_created
+    USER_APPOINTMENT_ORDER = (Appointment.created_at, Appointment.id)
+    
     @staticmethod
     def generate_booking_reference() -> str:
         """Generate a unique booking reference."""
         chars = string.ascii_uppercase + string.digits
         return 'SQ-' + ''.join(secrets.choice(chars) for _ in range(8))
     
+    @staticmethod
+    def generate_booking_references(count: int) -> list[str]:
+        """Generate booking references that are unique within a batch."""
+        references = set()
+        while len(references) < count:
+            references.add(AppointmentService.generate_booking_reference())
+        return list(references)
+    
+    @staticmethod
+    def resolve_slot(db: Session, appointment_data: AppointmentCreate) -> AppointmentCreate:
+        """Point a booking for a virtual slot at its physical row, creating the row on first booking."""
+        if appointment_data.slot_id > 0:
+            return appointment_data
+        
+        slot_id = slot_schedule.materialize(db, appointment_data.slot_id)
+        if slot_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Slot not found"
+            )
+        return appointment_data.model_copy(update={"slot_id": slot_id})
+    
     @staticmethod
     def book_appointment(
         db: Session,
@@ -22,6 +65,10 @@ class AppointmentService:
         appointment_data: AppointmentCreate
     ) -> Appointment:
         """Book an appointment with atomic transaction."""
+        appointment_data = AppointmentService.resolve_slot(db, appointment_data)
+        if settings.BOOKING_MODE == "conditional":
+            return AppointmentService.book_appointment_conditional(db, user_id, appointment_data)
+        
         # Start transaction
         try:
             # Get slot and lock it for update
@@ -51,31 +98,12 @@ class AppointmentService:
             # Get user for priority
             user = db.query(User).filter(User.id == user_id).first()
             
-            # Calculate queue position based on priority
-            existing_appointments = db.query(Appointment).filter(
-                Appointment.slot_id == slot.id,
-                Appointment.status == "CONFIRMED"
-            ).order_by(Appointment.queue_position).all()
-            
-            # Priority-based insertion
-            if user.priority_weight > 1:  # VIP or SENIOR
-                # Insert before regular users
-                queue_position = 1
-                for apt in existing_appointments:
-                    apt_user = db.query(User).filter(User.id == apt.user_id).first()
-                    if apt_user.priority_weight < user.priority_weight:
-                        break
-                    queue_position += 1
-                
-                # Update positions of appointments after this one
-                for apt in existing_appointments[queue_position-1:]:
-                    apt.queue_position += 1
-            else:
-                # Regular user - add to end
-                queue_position = len(existing_appointments) + 1
+            # Resolve queue position from the in-memory priority queue
+            slot_queue = queue_engine.get_queue(db, slot.id)
+            queue_position = slot_queue.position_for(user.priority_weight)
             
             # Calculate estimated wait time
-            estimated_wait = (queue_position - 1) * service.avg_duration_minutes
+            estimated_wait = wait_estimator.estimate(db, service.id, queue_position)
             
             # Create appointment
             booking_ref = AppointmentService.generate_booking_reference()
@@ -84,7 +112,7 @@ class AppointmentService:
                 slot_id=slot.id,
                 service_id=service.id,
                 booking_reference=booking_ref,
-                queue_position=queue_position,
+                priority_weight=user.priority_weight,
                 estimated_wait_minutes=estimated_wait,
                 status="CONFIRMED"
             )
@@ -96,43 +124,297 @@ class AppointmentService:
             SlotService.update_slot_status(db, slot)
             
             db.add(new_appointment)
-            db.commit()
+            db.flush()
+            AppointmentService.stage_booking_events(db, slot, [(new_appointment, queue_position)])
+            db.refresh(new_appointment)
+            
+            on_commit(db, lambda: queue_engine.add(slot.id, new_appointment.id, user.priority_weight, user_id))
+            
+            return new_appointment
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Booking failed: {str(e)}"
+            )
+    
+    @staticmethod
+    def reserve_capacity(db: Session, slot_id: int) -> bool:
+        """Reserve one seat with a single guarded UPDATE, without a row lock held across queries."""
+        next_count = Slot.booked_count + 1
+        # Status is assigned first so it sees the pre-increment count on every backend
+        result = db.execute(
+            update(Slot)
+            .where(Slot.id == slot_id, Slot.booked_count < Slot.capacity)
+            .ordered_values(
+                (Slot.status, case(
+                    (next_count >= Slot.capacity, "FULL"),
+                    (next_count * 100 >= Slot.capacity * 70, "CROWDED"),
+                    else_="AVAILABLE"
+                )),
+                (Slot.booked_count, next_count)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+    
+    @staticmethod
+    def book_appointment_conditional(
+        db: Session,
+        user_id: int,
+        appointment_data: AppointmentCreate
+    ) -> Appointment:
+        """Book an appointment by reserving capacity with a conditional UPDATE."""
+        try:
+            # Reads happen before the reservation so the slot row is locked only briefly
+            service = db.query(Service).filter(Service.id == appointment_data.service_id).first()
+            if not service:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Service not found"
+                )
+            
+            user = db.query(User).filter(User.id == user_id).first()
+            slot_queue = queue_engine.get_queue(db, appointment_data.slot_id)
+            
+            if not AppointmentService.reserve_capacity(db, appointment_data.slot_id):
+                exists = db.query(Slot.id).filter(Slot.id == appointment_data.slot_id).first()
+                if not exists:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Slot not found"
+                    )
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Slot is full"
+                )
+            
+            queue_position = slot_queue.position_for(user.priority_weight)
+            new_appointment = Appointment(
+                user_id=user_id,
+                slot_id=appointment_data.slot_id,
+                service_id=service.id,
+                booking_reference=AppointmentService.generate_booking_reference(),
+                priority_weight=user.priority_weight,
+                estimated_wait_minutes=wait_estimator.estimate(db, service.id, queue_position),
+                status="CONFIRMED"
+            )
+            db.add(new_appointment)
+            db.flush()
+            
+            # The reservation already holds the row, so this read sees our own update
+            slot = db.query(Slot).filter(Slot.id == appointment_data.slot_id).populate_existing().first()
+            AppointmentService.stage_booking_events(db, slot, [(new_appointment, queue_position)])
             db.refresh(new_appointment)
             
-            # Broadcast real-time updates
-            from app.websocket.manager import manager
-            import asyncio
-            
-            # Notify slot update
-            asyncio.create_task(manager.broadcast_slot_update(
-                slot.id,
-                {
-                    "capacity": slot.capacity,
-                    "booked_count": slot.booked_count,
-                    "status": slot.status
-                }
-            ))
-            
-            # Notify user
-            asyncio.create_task(manager.notify_appointment_update(
-                user_id,
-                new_appointment.id,
-                "CONFIRMED",
-                queue_position
-            ))
+            on_commit(db, lambda: queue_engine.add(slot.id, new_appointment.id, user.priority_weight, user_id))
             
             return new_appointment
             
         except HTTPException:
-            db.rollback()
             raise
         except Exception as e:
-            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Booking failed: {str(e)}"
             )
     
+    @staticmethod
+    def book_many(
+        db: Session,
+        requests: list[tuple[int, AppointmentCreate]],
+        guest_names: list[Optional[str]] = None,
+        all_or_nothing: bool = False
+    ) -> list:
+        """
+        Book a group of appointments in one transaction.
+        Returns one entry per request: the Appointment, or the HTTPException that rejected it.
+        With all_or_nothing, any rejection leaves the whole group unbooked.
+        Guest entries are booked under their user_id at standard priority.
+        """
+        if guest_names is None:
+            guest_names = [None] * len(requests)
+        
+        resolved = []
+        for user_id, data in requests:
+            try:
+                data = AppointmentService.resolve_slot(db, data)
+            except HTTPException:
+                pass  # Unknown virtual slot, rejected below as not found
+            resolved.append((user_id, data))
+        requests = resolved
+        
+        # Unresolved virtual ids never reach the IN list; they are reported as not found below
+        slot_ids = sorted({data.slot_id for _, data in requests if data.slot_id > 0})
+        service_ids = {data.service_id for _, data in requests}
+        user_ids = {user_id for user_id, _ in requests}
+        
+        try:
+            # Lock every affected slot once, in id order to avoid deadlocks
+            slots = {
+                slot.id: slot for slot in db.query(Slot).filter(
+                    Slot.id.in_(slot_ids)
+                ).order_by(Slot.id).with_for_update().all()
+            }
+            services = {
+                service.id: service for service in db.query(Service).filter(
+                    Service.id.in_(service_ids)
+                ).all()
+            }
+            weights = dict(db.query(User.id, User.priority_weight).filter(User.id.in_(user_ids)).all())
+            
+            results = []
+            queued = []
+            batch_weights = {slot_id: [] for slot_id in slot_ids}
+            # Applied to the slots only once the group is known to be booked
+            booked = {slot_id: 0 for slot_id in slot_ids}
+            references = AppointmentService.generate_booking_references(len(requests))
+            for (user_id, data), guest_name, booking_ref in zip(requests, guest_names, references):
+                slot = slots.get(data.slot_id)
+                service = services.get(data.service_id)
+                if user_id not in weights:
+                    results.append(HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found"))
+                    continue
+                if not slot:
+                    results.append(HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Slot not found"))
+                    continue
+                if slot.booked_count + booked[slot.id] >= slot.capacity:
+                    results.append(HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Slot is full"))
+                    continue
+                if not service:
+                    results.append(HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found"))
+                    continue
+                
+                # Position among committed entries plus earlier entries of this batch
+                weight = 1 if guest_name else weights[user_id]
+                queue_position = queue_engine.get_queue(db, slot.id).position_for(weight) + sum(
+                    1 for earlier in batch_weights[slot.id] if earlier >= weight
+                )
+                batch_weights[slot.id].append(weight)
+                booked[slot.id] += 1
+                
+                appointment = Appointment(
+                    user_id=user_id,
+                    slot_id=slot.id,
+                    service_id=service.id,
+                    booking_reference=booking_ref,
+                    guest_name=guest_name,
+                    priority_weight=weight,
+                    estimated_wait_minutes=wait_estimator.estimate(db, service.id, queue_position),
+                    status="CONFIRMED"
+                )
+                results.append(appointment)
+                queued.append((appointment, queue_position))
+            
+            appointments = [result for result in results if isinstance(result, Appointment)]
+            if not appointments or (all_or_nothing and len(appointments) < len(results)):
+                return results
+            
+            for slot_id, count in booked.items():
+                slots[slot_id].booked_count += count
+            db.add_all(appointments)
+            db.flush()
+            appointment_ids = [appointment.id for appointment in appointments]
+            for slot_id in {appointment.slot_id for appointment in appointments}:
+                SlotService.update_slot_status(db, slots[slot_id])
+                # One aggregated slot update per slot, one notification per booking
+                AppointmentService.stage_booking_events(
+                    db,
+                    slots[slot_id],
+                    [(appointment, position) for appointment, position in queued if appointment.slot_id == slot_id]
+                )
+            
+            # Load queue positions for the whole batch in one query instead of a refresh per row
+            db.query(Appointment).filter(Appointment.id.in_(appointment_ids)).populate_existing().all()
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Booking failed: {str(e)}"
+            )
+        
+        def enqueue():
+            for appointment in appointments:
+                queue_engine.add(appointment.slot_id, appointment.id, appointment.priority_weight, appointment.user_id)
+        on_commit(db, enqueue)
+        
+        return results
+    
+    @staticmethod
+    def book_batch(db: Session, current_user: User, batch_data: BatchBookingRequest) -> BatchBookingResponse:
+        """Book appointments for a group of users and guests in one request."""
+        if not batch_data.entries:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Batch must contain at least one entry"
+            )
+        
+        if len(batch_data.entries) > settings.BOOKING_GROUP_MAX_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Batch cannot exceed {settings.BOOKING_GROUP_MAX_SIZE} entries"
+            )
+        
+        if batch_data.mode not in ("ALL_OR_NOTHING", "BEST_EFFORT"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Mode must be ALL_OR_NOTHING or BEST_EFFORT"
+            )
+        
+        # Only admins may book on behalf of other accounts; guests belong to the caller
+        requests = []
+        guest_names = []
+        for entry in batch_data.entries:
+            user_id = entry.user_id or current_user.id
+            if entry.guest:
+                user_id = current_user.id
+            elif user_id != current_user.id and current_user.role != "ADMIN":
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Not authorized to book for other users"
+                )
+            requests.append((user_id, AppointmentCreate(slot_id=entry.slot_id, service_id=entry.service_id)))
+            guest_names.append(entry.guest.name if entry.guest else None)
+        
+        all_or_nothing = batch_data.mode == "ALL_OR_NOTHING"
+        results = AppointmentService.book_many(db, requests, guest_names, all_or_nothing)
+        
+        failures = [
+            f"entry {index}: {result.detail}"
+            for index, result in enumerate(results) if isinstance(result, HTTPException)
+        ]
+        if all_or_nothing and failures:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Batch rejected, nothing was booked (" + "; ".join(failures) + ")"
+            )
+        
+        return BatchBookingResponse(
+            booked=len(results) - len(failures),
+            failed=len(failures),
+            results=[
+                BatchBookingResult(index=index, success=False, error=result.detail)
+                if isinstance(result, HTTPException)
+                else BatchBookingResult(
+                    index=index,
+                    success=True,
+                    appointment=AppointmentResponse.model_validate(result)
+                )
+                for index, result in enumerate(results)
+            ]
+        )
+    
+    @staticmethod
+    def stage_booking_events(db: Session, slot: Slot, bookings: List[Tuple[Appointment, int]]) -> None:
+        """Queue the slot update and per-user notifications, sent once the transaction commits."""
+        event_bus.stage_slot_update(db, slot)
+        slot_cache.stage_update(db, slot)
+        for appointment, queue_position in bookings:
+            event_bus.stage_appointment_update(
+                db, appointment.user_id, appointment.id, "CONFIRMED", queue_position
+            )
+    
     @staticmethod
     def get_appointment_by_id(db: Session, appointment_id: int) -> Appointment:
         """Get appointment by ID."""
@@ -145,11 +427,23 @@ class AppointmentService:
         return appointment
     
     @staticmethod
-    def get_user_appointments(db: Session, user_id: int) -> list[Appointment]:
-        """Get all appointments for a user."""
-        return db.query(Appointment).filter(
-            Appointment.user_id == user_id
-        ).order_by(Appointment.created_at.desc()).all()
+    def get_user_appointments(
+        db: Session,
+        user_id: int,
+        cursor: str = None,
+        limit: int = 100
+    ) -> Tuple[list[Appointment], Optional[str], int]:
+        """Get a page of a user's appointments, newest first. Returns (appointments, next_cursor, estimated_total)."""
+        query = AppointmentService.user_appointments_query(db, user_id)
+        appointments, next_cursor = keyset_page(
+            query, AppointmentService.USER_APPOINTMENT_ORDER, cursor, limit, descending=True
+        )
+        return appointments, next_cursor, estimate_count(db, query)
+    
+    @staticmethod
+    def user_appointments_query(db: Session, user_id: int):
+        """A user's appointments, before paging."""
+        return db.query(Appointment).filter(Appointment.user_id == user_id)
     
     @staticmethod
     def cancel_appointment(db: Session, appointment_id: int, user_id: int) -> None:
@@ -169,62 +463,55 @@ class AppointmentService:
                 detail="Appointment cannot be cancelled"
             )
         
+        slot_queue = queue_engine.get_queue(db, appointment.slot_id)
+        vacated_position = slot_queue.position(appointment.id)
+        
         # Update appointment status
         appointment.status = "CANCELLED"
         from datetime import datetime
         appointment.cancelled_at = datetime.utcnow()
         
-        # Update slot booked count
-        slot = db.query(Slot).filter(Slot.id == appointment.slot_id).first()
+        # Update slot booked count, locking the slot so the freed seat goes to the waitlist
+        slot = db.query(Slot).filter(Slot.id == appointment.slot_id).with_for_update().first()
+        promoted_position = None
         if slot:
             slot.booked_count = max(0, slot.booked_count - 1)
             SlotService.update_slot_status(db, slot)
+            
+            # Hand the seat to the head of the waitlist in this same transaction
+            from app.waitlist.service import WaitlistService
+            promoted = WaitlistService.promote_next(db, slot, appointment.id)
+            if promoted:
+                promoted_position = promoted[1]
+            event_bus.stage_slot_update(db, slot)
+            slot_cache.stage_update(db, slot)
         
-        # Recalculate queue positions
-        remaining_appointments = db.query(Appointment).filter(
-            Appointment.slot_id == appointment.slot_id,
-            Appointment.status == "CONFIRMED",
-            Appointment.queue_position > appointment.queue_position
-        ).all()
-        
-        for apt in remaining_appointments:
-            apt.queue_position -= 1
-        
-        db.commit()
+        # Positions are derived from the ordering key, so only users whose
+        # position actually moved are notified and no other rows are touched
+        if vacated_position:
+            start = min(vacated_position, promoted_position or vacated_position)
+            for apt_id, apt_user_id, position in slot_queue.entries_from(start):
+                if apt_id == appointment.id:
+                    continue
+                new_position = position - 1 if position > vacated_position else position
+                if promoted_position and new_position >= promoted_position:
+                    new_position += 1
+                if new_position != position:
+                    event_bus.stage_appointment_update(db, apt_user_id, apt_id, "CONFIRMED", new_position)
         
-        # Broadcast updates
-        from app.websocket.manager import manager
-        import asyncio
+        db.flush()
         
-        # Notify slot update
-        if slot:
-            asyncio.create_task(manager.broadcast_slot_update(
-                slot.id,
-                {
-                    "capacity": slot.capacity,
-                    "booked_count": slot.booked_count,
-                    "status": slot.status
-                }
-            ))
-        
-        # Notify affected users about queue position changes
-        for apt in remaining_appointments:
-            asyncio.create_task(manager.notify_appointment_update(
-                apt.user_id,
-                apt.id,
-                "CONFIRMED",
-                apt.queue_position
-            ))
+        def dequeue():
+            queue_engine.remove(appointment.slot_id, appointment.id)
+            dispatch_engine.discard(appointment.id)
+        on_commit(db, dequeue)
     
     @staticmethod
     def get_queue_status(db: Session, appointment_id: int) -> QueueStatus:
         """Get current queue status for an appointment."""
         appointment = AppointmentService.get_appointment_by_id(db, appointment_id)
         
-        total_in_queue = db.query(Appointment).filter(
-            Appointment.slot_id == appointment.slot_id,
-            Appointment.status == "CONFIRMED"
-        ).count()
+        total_in_queue = queue_engine.entries_query(db, appointment.slot_id).count()
         
         return QueueStatus(
             appointment_id=appointment.id,
@@ -1,8 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from core.security import decode_token
-from db.database import get_db
+from db.database import DbSession, get_session, run_db
 from db.models import User
 from typing import Optional
 
@@ -10,7 +9,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ) -> User:
     """Get current authenticated user from JWT token."""
     token = credentials.credentials
@@ -35,7 +34,7 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await run_db(db, lambda session: session.query(User).filter(User.id == user_id).first())
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from db.database import get_db
+from db.database import DbSession, get_session, run_db, run_unit_of_work
 from app.auth.schemas import UserCreate, UserLogin, UserResponse, Token
 from app.auth.service import AuthService
 from app.auth.dependencies import get_current_user
@@ -9,15 +8,15 @@ from db.models import User
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: DbSession = Depends(get_session)):
     """Register a new user."""
-    user = AuthService.register_user(db, user_data)
+    user = await run_unit_of_work(db, AuthService.register_user, user_data)
     return user
 
 @router.post("/login")
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: DbSession = Depends(get_session)):
     """Login and get access tokens with user info."""
-    user = AuthService.authenticate_user(db, login_data)
+    user = await run_db(db, AuthService.authenticate_user, login_data)
     tokens = AuthService.create_tokens(user)
     
     # Return tokens along with user info
@@ -39,7 +38,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def refresh_token(current_user: User = Depends(get_current_user), db: DbSession = Depends(get_session)):
     """Refresh access token."""
     tokens = AuthService.create_tokens(current_user)
     return tokens
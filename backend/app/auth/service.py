@@ -38,12 +38,14 @@ class AuthService:
         )
         
         db.add(new_user)
-        db.commit()
+        db.flush()
         db.refresh(new_user)
         
-        # Auto-seed database with services and slots if this is the first user
+        # Auto-seed database with services and slots if this is the first user.
+        # A savepoint keeps a failed seed from undoing the registration.
         try:
-            auto_seed_database(db)
+            with db.begin_nested():
+                auto_seed_database(db)
         except Exception as e:
             print(f"Auto-seed warning: {e}")
             # Don't fail registration if seeding fails
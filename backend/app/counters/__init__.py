@@ -0,0 +1 @@
+# Counters module
@@ -0,0 +1,103 @@
+from sqlalchemy.orm import Session
+from db.models import Appointment, Counter, Slot
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+# (slot date, slot start time, -priority_weight)
+DispatchKey = Tuple[date, time, int]
+# (user_id, slot_id, booking_reference)
+DispatchDetails = Tuple[int, int, str]
+
+class DispatchEngine:
+    """In-memory index of checked-in appointments waiting for a counter.
+
+    Each service has a heap ordered by (slot date, slot start, -priority_weight,
+    appointment id), so calling the next appointment is a heap pop instead of
+    a scan of the appointments table. Removals are lazy: entries that are no
+    longer live are skipped when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self.heaps: Dict[int, List[Tuple[DispatchKey, int]]] = {}
+        # appointment_id -> (service_id, key, details)
+        self.live: Dict[int, Tuple[int, DispatchKey, DispatchDetails]] = {}
+        self.waiting: Dict[int, int] = {}
+        # counter_id -> (service_id, name)
+        self.counters: Dict[int, Tuple[int, str]] = {}
+        # counter_id -> when its current appointment was called
+        self.serving_since: Dict[int, datetime] = {}
+
+    def rebuild(self, db: Session, from_date: date = None) -> int:
+        """Load checked-in appointments that are still waiting in a single query."""
+        if from_date is None:
+            from_date = date.today()
+
+        rows = db.query(
+            Appointment.id,
+            Appointment.service_id,
+            Appointment.user_id,
+            Appointment.slot_id,
+            Appointment.booking_reference,
+            Appointment.priority_weight,
+            Slot.date,
+            Slot.start_time
+        ).join(Slot, Slot.id == Appointment.slot_id).filter(
+            Slot.date >= from_date,
+            Appointment.status == "CONFIRMED",
+            Appointment.checked_in_at.isnot(None)
+        ).all()
+
+        self.heaps = {}
+        self.live = {}
+        self.waiting = {}
+        for appointment_id, service_id, user_id, slot_id, booking_reference, priority_weight, slot_date, start_time in rows:
+            self.add(
+                service_id,
+                appointment_id,
+                (slot_date, start_time, -(priority_weight or 1)),
+                (user_id, slot_id, booking_reference)
+            )
+        return len(rows)
+
+    def add(self, service_id: int, appointment_id: int, key: DispatchKey, details: DispatchDetails) -> None:
+        """Index a checked-in appointment."""
+        if appointment_id in self.live:
+            return
+        self.live[appointment_id] = (service_id, key, details)
+        self.waiting[service_id] = self.waiting.get(service_id, 0) + 1
+        heapq.heappush(self.heaps.setdefault(service_id, []), (key, appointment_id))
+
+    def pop(self, service_id: int) -> Optional[Tuple[int, DispatchKey, DispatchDetails]]:
+        """Take the next live appointment for a service."""
+        heap = self.heaps.get(service_id)
+        while heap:
+            _, appointment_id = heapq.heappop(heap)
+            entry = self.live.pop(appointment_id, None)
+            if entry is not None:
+                self.waiting[service_id] -= 1
+                return appointment_id, entry[1], entry[2]
+        return None
+
+    def discard(self, appointment_id: int) -> None:
+        """Forget an appointment that left the waiting line."""
+        entry = self.live.pop(appointment_id, None)
+        if entry is not None:
+            self.waiting[entry[0]] -= 1
+
+    def waiting_count(self, service_id: int) -> int:
+        """Number of checked-in appointments waiting for a service."""
+        return self.waiting.get(service_id, 0)
+
+    def counter_info(self, db: Session, counter_id: int) -> Optional[Tuple[int, str]]:
+        """Get (service_id, name) for a counter, loading it once."""
+        info = self.counters.get(counter_id)
+        if info is None:
+            row = db.query(Counter.service_id, Counter.name).filter(Counter.id == counter_id).first()
+            if row is None:
+                return None
+            info = self.counters[counter_id] = (row[0], row[1])
+        return info
+
+# Global dispatch engine instance
+dispatch_engine = DispatchEngine()
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query, status
+from db.database import DbSession, get_session, run_db, run_unit_of_work
+from app.counters.schemas import CounterCreate, CounterResponse, NowServing, CheckInResponse
+from app.counters.service import CounterService
+from app.auth.dependencies import get_current_user, require_admin
+from db.models import User
+
+router = APIRouter()
+
+@router.post("/", response_model=CounterResponse, status_code=status.HTTP_201_CREATED)
+async def create_counter(
+    counter_data: CounterCreate,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Create a new counter (Admin only)."""
+    return await run_unit_of_work(db, CounterService.create_counter, counter_data)
+
+@router.get("/", response_model=list[CounterResponse])
+async def list_counters(
+    service_id: int = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """List counters with their current appointment."""
+    return await run_db(db, CounterService.get_counters, service_id)
+
+@router.post("/check-in/{appointment_id}", response_model=CheckInResponse)
+async def check_in(
+    appointment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Check in on arrival so the appointment can be called to a counter."""
+    return await run_unit_of_work(db, CounterService.check_in, appointment_id, current_user)
+
+@router.post("/{counter_id}/call-next", response_model=NowServing)
+async def call_next(
+    counter_id: int,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Call the next checked-in appointment to this counter (Admin only)."""
+    return await run_unit_of_work(db, CounterService.call_next, counter_id)
+
+@router.post("/{counter_id}/complete", status_code=status.HTTP_204_NO_CONTENT)
+async def complete(
+    counter_id: int,
+    no_show: bool = Query(False),
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Finish the counter's current appointment (Admin only)."""
+    await run_unit_of_work(db, CounterService.complete, counter_id, no_show)
+    return None
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class CounterCreate(BaseModel):
+    name: str
+    service_id: int
+    is_active: bool = True
+
+class CounterResponse(BaseModel):
+    id: int
+    name: str
+    service_id: int
+    is_active: bool
+    current_serving_appointment_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class NowServing(BaseModel):
+    counter_id: int
+    counter_name: str
+    appointment_id: int
+    booking_reference: str
+    user_id: int
+    slot_id: int
+    waiting_count: int
+
+class CheckInResponse(BaseModel):
+    appointment_id: int
+    checked_in_at: datetime
+    waiting_count: int
@@ -0,0 +1,250 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+from fastapi import HTTPException, status
+from db.database import on_commit, on_rollback
+from db.models import Appointment, Counter, Service, Slot, User
+from app.counters.schemas import CounterCreate, NowServing, CheckInResponse
+from app.counters.engine import dispatch_engine
+from app.queue.engine import queue_engine
+from app.queue.estimator import wait_estimator
+from app.events.bus import event_bus
+from datetime import date, datetime
+
+class CounterService:
+    """Service for counters and the check-in / call-next / complete serving flow."""
+    
+    @staticmethod
+    def create_counter(db: Session, counter_data: CounterCreate) -> Counter:
+        """Create a new counter."""
+        service = db.query(Service).filter(Service.id == counter_data.service_id).first()
+        if not service:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Service not found"
+            )
+        
+        new_counter = Counter(**counter_data.model_dump())
+        db.add(new_counter)
+        db.flush()
+        db.refresh(new_counter)
+        
+        # More counters means shorter waits for everyone queued for the service
+        on_commit(db, lambda: wait_estimator.reset_service(counter_data.service_id))
+        return new_counter
+    
+    @staticmethod
+    def get_counters(db: Session, service_id: int = None) -> list[Counter]:
+        """Get list of counters, optionally for one service."""
+        query = db.query(Counter)
+        if service_id:
+            query = query.filter(Counter.service_id == service_id)
+        return query.order_by(Counter.id).all()
+    
+    @staticmethod
+    def check_in(db: Session, appointment_id: int, current_user: User) -> CheckInResponse:
+        """Mark an appointment as arrived so it can be called to a counter."""
+        row = db.query(
+            Appointment.user_id,
+            Appointment.service_id,
+            Appointment.slot_id,
+            Appointment.booking_reference,
+            Appointment.priority_weight,
+            Appointment.status,
+            Slot.date,
+            Slot.start_time
+        ).join(Slot, Slot.id == Appointment.slot_id).filter(Appointment.id == appointment_id).first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Appointment not found"
+            )
+        
+        user_id, service_id, slot_id, booking_reference, priority_weight, appointment_status, slot_date, start_time = row
+        
+        if user_id != current_user.id and current_user.role != "ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to check in this appointment"
+            )
+        
+        if appointment_status != "CONFIRMED":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only confirmed appointments can check in"
+            )
+        
+        if slot_date != date.today():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Check-in is only open on the day of the appointment"
+            )
+        
+        checked_in_at = datetime.utcnow()
+        checked_in = db.execute(
+            update(Appointment)
+            .where(
+                Appointment.id == appointment_id,
+                Appointment.status == "CONFIRMED",
+                Appointment.checked_in_at.is_(None)
+            )
+            .values(checked_in_at=checked_in_at)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not checked_in:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Appointment is already checked in"
+            )
+        
+        on_commit(db, lambda: dispatch_engine.add(
+            service_id,
+            appointment_id,
+            (slot_date, start_time, -(priority_weight or 1)),
+            (user_id, slot_id, booking_reference)
+        ))
+        
+        return CheckInResponse(
+            appointment_id=appointment_id,
+            checked_in_at=checked_in_at,
+            waiting_count=dispatch_engine.waiting_count(service_id) + 1
+        )
+    
+    @staticmethod
+    def call_next(db: Session, counter_id: int) -> NowServing:
+        """Assign the next checked-in appointment for the counter's service to the counter."""
+        info = dispatch_engine.counter_info(db, counter_id)
+        if not info:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Counter not found"
+            )
+        service_id, counter_name = info
+        
+        # Entries cancelled or served elsewhere fail the guard and are skipped
+        while True:
+            candidate = dispatch_engine.pop(service_id)
+            if candidate is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No checked-in appointments waiting"
+                )
+            appointment_id, key, details = candidate
+            serving = db.execute(
+                update(Appointment)
+                .where(Appointment.id == appointment_id, Appointment.status == "CONFIRMED")
+                .values(status="SERVING")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if serving:
+                break
+        
+        # Put the appointment back in line if this transaction does not commit
+        on_rollback(db, lambda: dispatch_engine.add(service_id, appointment_id, key, details))
+        
+        claimed = db.execute(
+            update(Counter)
+            .where(
+                Counter.id == counter_id,
+                Counter.is_active == True,
+                Counter.current_serving_appointment_id.is_(None)
+            )
+            .values(current_serving_appointment_id=appointment_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Counter is inactive or still serving an appointment"
+            )
+        
+        user_id, slot_id, booking_reference = details
+        
+        # The served appointment leaves the slot queue, so everyone behind it moves up
+        slot_queue = queue_engine.get_queue(db, slot_id)
+        vacated_position = slot_queue.position(appointment_id)
+        if vacated_position:
+            for apt_id, apt_user_id, position in slot_queue.entries_from(vacated_position + 1):
+                event_bus.stage_appointment_update(db, apt_user_id, apt_id, "CONFIRMED", position - 1)
+        
+        event_bus.stage_appointment_update(db, user_id, appointment_id, "SERVING")
+        event_bus.stage_counter_update(db, counter_id, {
+            "counter_name": counter_name,
+            "appointment_id": appointment_id,
+            "booking_reference": booking_reference,
+            "slot_id": slot_id
+        })
+        def serve():
+            queue_engine.remove(slot_id, appointment_id)
+            dispatch_engine.serving_since[counter_id] = datetime.utcnow()
+        on_commit(db, serve)
+        
+        return NowServing(
+            counter_id=counter_id,
+            counter_name=counter_name,
+            appointment_id=appointment_id,
+            booking_reference=booking_reference,
+            user_id=user_id,
+            slot_id=slot_id,
+            waiting_count=dispatch_engine.waiting_count(service_id)
+        )
+    
+    @staticmethod
+    def complete(db: Session, counter_id: int, no_show: bool = False) -> None:
+        """Finish the counter's current appointment and free the counter."""
+        row = db.query(
+            Counter.name,
+            Counter.current_serving_appointment_id,
+            Appointment.user_id
+        ).outerjoin(
+            Appointment, Appointment.id == Counter.current_serving_appointment_id
+        ).filter(Counter.id == counter_id).first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Counter not found"
+            )
+        
+        counter_name, appointment_id, user_id = row
+        if appointment_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Counter is not serving an appointment"
+            )
+        
+        final_status = "NO_SHOW" if no_show else "COMPLETED"
+        db.execute(
+            update(Appointment)
+            .where(Appointment.id == appointment_id, Appointment.status == "SERVING")
+            .values(status=final_status, completed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        released = db.execute(
+            update(Counter)
+            .where(Counter.id == counter_id, Counter.current_serving_appointment_id == appointment_id)
+            .values(current_serving_appointment_id=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not released:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Counter was updated by another request"
+            )
+        
+        service_id = dispatch_engine.counter_info(db, counter_id)[0]
+        
+        def finish():
+            # Feed the observed service time and no-show into the wait estimates
+            started = dispatch_engine.serving_since.pop(counter_id, None)
+            minutes = (datetime.utcnow() - started).total_seconds() / 60 if started else None
+            wait_estimator.record_service(service_id, minutes, no_show)
+        on_commit(db, finish)
+        
+        event_bus.stage_appointment_update(db, user_id, appointment_id, final_status)
+        event_bus.stage_counter_update(db, counter_id, {
+            "counter_name": counter_name,
+            "appointment_id": None,
+            "booking_reference": None,
+            "slot_id": None
+        })
@@ -0,0 +1,157 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.websocket.manager import manager
+from core.config import settings
+from typing import Dict, Optional, Tuple
+import asyncio
+
+class EventBus:
+    """Post-commit event bus for real-time notifications.
+
+    Services stage events on the session while the transaction is open.
+    Staged events are released only when the session commits (and dropped
+    on rollback), then coalesced per slot and per appointment and delivered
+    through the ConnectionManager by a single dispatcher task.
+    """
+
+    def __init__(self):
+        # slot_id -> latest slot data
+        self.slot_updates: Dict[int, dict] = {}
+        # appointment_id -> (user_id, status, queue_position)
+        self.appointment_updates: Dict[int, Tuple[int, str, Optional[int]]] = {}
+        # entry_id -> (user_id, status, position, appointment_id)
+        self.waitlist_updates: Dict[int, Tuple[int, str, Optional[int], Optional[int]]] = {}
+        # counter_id -> latest "now serving" data
+        self.counter_updates: Dict[int, dict] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _staged(db: Session) -> list:
+        return db.info.setdefault("staged_events", [])
+
+    def stage_slot_update(self, db: Session, slot) -> None:
+        """Queue a slot availability update for after commit."""
+        self._staged(db).append(("slot", slot.id, {
+            "capacity": slot.capacity,
+            "booked_count": slot.booked_count,
+            "status": slot.status
+        }))
+
+    def stage_appointment_update(
+        self,
+        db: Session,
+        user_id: int,
+        appointment_id: int,
+        status: str,
+        queue_position: int = None
+    ) -> None:
+        """Queue a personal appointment update for after commit."""
+        self._staged(db).append(("appointment", appointment_id, (user_id, status, queue_position)))
+
+    def stage_waitlist_update(
+        self,
+        db: Session,
+        user_id: int,
+        entry_id: int,
+        status: str,
+        position: int = None,
+        appointment_id: int = None
+    ) -> None:
+        """Queue a personal waitlist update for after commit."""
+        self._staged(db).append(("waitlist", entry_id, (user_id, status, position, appointment_id)))
+
+    def stage_counter_update(self, db: Session, counter_id: int, serving_data: dict) -> None:
+        """Queue a "now serving" update for a counter for after commit."""
+        self._staged(db).append(("counter", counter_id, serving_data))
+
+    def release(self, db: Session) -> None:
+        """Hand a committed session's events to the dispatcher."""
+        staged = db.info.pop("staged_events", None)
+        if not staged or self.task is None:
+            return
+
+        for kind, key, payload in staged:
+            if kind == "slot":
+                self.slot_updates[key] = payload
+            elif kind == "appointment":
+                self.appointment_updates[key] = payload
+            elif kind == "waitlist":
+                self.waitlist_updates[key] = payload
+            else:
+                self.counter_updates[key] = payload
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    def discard(self, db: Session) -> None:
+        """Drop events staged by a rolled back transaction."""
+        db.info.pop("staged_events", None)
+
+    def start(self) -> None:
+        """Start the dispatcher task on the running loop."""
+        if self.task is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.task = self.loop.create_task(self._dispatch_forever())
+
+    async def stop(self) -> None:
+        """Deliver anything still pending and stop the dispatcher."""
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        await self.dispatch()
+
+    async def dispatch(self) -> None:
+        """Send every coalesced event in one pass."""
+        slot_updates, self.slot_updates = self.slot_updates, {}
+        appointment_updates, self.appointment_updates = self.appointment_updates, {}
+        waitlist_updates, self.waitlist_updates = self.waitlist_updates, {}
+        counter_updates, self.counter_updates = self.counter_updates, {}
+
+        sends = [
+            manager.broadcast_slot_update(slot_id, data)
+            for slot_id, data in slot_updates.items()
+        ]
+        sends += [
+            manager.notify_appointment_update(user_id, appointment_id, status, queue_position)
+            for appointment_id, (user_id, status, queue_position) in appointment_updates.items()
+        ]
+        sends += [
+            manager.notify_waitlist_update(user_id, entry_id, status, position, appointment_id)
+            for entry_id, (user_id, status, position, appointment_id) in waitlist_updates.items()
+        ]
+        sends += [
+            manager.broadcast_now_serving(counter_id, data)
+            for counter_id, data in counter_updates.items()
+        ]
+        if sends:
+            await asyncio.gather(*sends, return_exceptions=True)
+
+    async def _dispatch_forever(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            # Let events from concurrent commits accumulate into one batch
+            await asyncio.sleep(settings.EVENT_DISPATCH_INTERVAL_MS / 1000)
+            self.wakeup.clear()
+            await self.dispatch()
+
+# Global event bus instance
+event_bus = EventBus()
+
+@event.listens_for(Session, "after_commit")
+def _release_events(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    event_bus.release(session)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_events(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    event_bus.discard(session)
@@ -0,0 +1,107 @@
+from sqlalchemy.orm import Session
+from db.models import LoadAggregate, LoadHistory, Slot
+from datetime import date, time
+from typing import Dict, Iterable, List, Set, Tuple
+import json
+
+# Days of history per (service, weekday, start time) the WMA averages over
+HISTORY_WINDOW = 10
+
+class LoadAggregateService:
+    """Rolling WMA state per (service, weekday, start time).
+
+    Each aggregate keeps the load of the last HISTORY_WINDOW days that slot
+    ran (oldest first) together with their plain and linearly weighted
+    sums, newest weighted highest. A new day's sample shifts the window and
+    a later sample of the same day replaces that day's value, each in
+    constant time, so a prediction reads the WMA from one row.
+    """
+
+    @staticmethod
+    def add_sample(aggregate: LoadAggregate, slot_date: date, load_percentage: float) -> None:
+        """Fold one load sample into an aggregate's rolling sums."""
+        window = json.loads(aggregate.window)
+        count = aggregate.sample_count
+        if window and aggregate.last_date == slot_date:
+            # A later sample of the same day replaces that day's value
+            delta = load_percentage - window[-1]
+            window[-1] = load_percentage
+            aggregate.load_sum += delta
+            aggregate.weighted_sum += count * delta
+        elif count < HISTORY_WINDOW:
+            window.append(load_percentage)
+            aggregate.sample_count = count + 1
+            aggregate.load_sum += load_percentage
+            aggregate.weighted_sum += (count + 1) * load_percentage
+        else:
+            # Every weight drops by one and the oldest day falls out of the window
+            oldest = window.pop(0)
+            window.append(load_percentage)
+            aggregate.weighted_sum += HISTORY_WINDOW * load_percentage - aggregate.load_sum
+            aggregate.load_sum += load_percentage - oldest
+        aggregate.window = json.dumps(window)
+        aggregate.last_date = slot_date
+
+    @staticmethod
+    def get_many(db: Session, keys: Iterable[Tuple[int, int, time]]) -> Dict[Tuple[int, int, time], LoadAggregate]:
+        """Get the aggregates for (service_id, weekday, start_time) keys; missing keys have no history."""
+        keys = set(keys)
+        if not keys:
+            return {}
+        found = {}
+        for aggregate in LoadAggregateService.aggregates_query(db, keys):
+            key = (aggregate.service_id, aggregate.weekday, aggregate.start_time)
+            if key in keys:
+                found[key] = aggregate
+        return found
+
+    @staticmethod
+    def aggregates_query(db: Session, keys: Set[Tuple[int, int, time]]):
+        """Aggregates matching every component of the keys; may include extra combinations."""
+        return db.query(LoadAggregate).filter(
+            LoadAggregate.service_id.in_({key[0] for key in keys}),
+            LoadAggregate.weekday.in_({key[1] for key in keys}),
+            LoadAggregate.start_time.in_({key[2] for key in keys})
+        )
+
+    @staticmethod
+    def record(db: Session, samples: List[Tuple[int, date, time, float]]) -> int:
+        """Fold (service_id, slot_date, start_time, load_percentage) samples, oldest first, into their aggregates."""
+        if not samples:
+            return 0
+        keys = {(service_id, slot_date.weekday(), start_time) for service_id, slot_date, start_time, _ in samples}
+        aggregates = LoadAggregateService.get_many(db, keys)
+        for service_id, slot_date, start_time, load_percentage in samples:
+            key = (service_id, slot_date.weekday(), start_time)
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregate = aggregates[key] = LoadAggregate(
+                    service_id=service_id,
+                    weekday=key[1],
+                    start_time=start_time,
+                    sample_count=0,
+                    load_sum=0.0,
+                    weighted_sum=0.0,
+                    window="[]"
+                )
+                db.add(aggregate)
+            LoadAggregateService.add_sample(aggregate, slot_date, load_percentage or 0.0)
+        db.flush()
+        return len(samples)
+
+    @staticmethod
+    def history_samples(db: Session) -> List[Tuple[int, date, time, float]]:
+        """Every load_history row as a (service_id, slot_date, start_time, load_percentage) sample, oldest first."""
+        samples = db.query(
+            Slot.service_id,
+            Slot.date,
+            Slot.start_time,
+            LoadHistory.load_percentage
+        ).join(Slot, LoadHistory.slot_id == Slot.id).order_by(LoadHistory.timestamp).all()
+        return [tuple(sample) for sample in samples]
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute every aggregate by replaying load_history in time order."""
+        db.query(LoadAggregate).delete(synchronize_session=False)
+        return LoadAggregateService.record(db, LoadAggregateService.history_samples(db))
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from db.models import Slot, Appointment, Prediction, LoadHistory, Service
+from db.models import Slot, Appointment, Prediction, Service
+from app.prediction.predictors import get_predictor
+from app.slots.schedule import slot_schedule
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+import numpy as np
 
 class PredictionAlgorithms:
     """Prediction algorithms for wait time and congestion."""
@@ -41,42 +44,64 @@ class PredictionAlgorithms:
         Predict wait time for a slot using historical data.
         Returns: (predicted_wait_minutes, congestion_score, confidence_score)
         """
-        slot = db.query(Slot).filter(Slot.id == slot_id).first()
+        slot = slot_schedule.get_slot(db, slot_id)
         if not slot:
             return 0, 0.0, 0.0
+        return PredictionAlgorithms.predict_many(db, [slot])[0][:3]
+    
+    @staticmethod
+    def predict_many(db: Session, slots: List[Slot]) -> List[Tuple[int, float, float, str]]:
+        """
+        Predict wait time for many slots at once, in the order given.
+        Each slot's load is forecast by its service's predictor, one batch per
+        predictor; durations and queue sizes are read with one query each, and
+        congestion and waits are computed as arrays over every slot together.
+        Returns: [(predicted_wait_minutes, congestion_score, confidence_score, algorithm_version), ...]
+        """
+        if not slots:
+            return []
         
-        service = db.query(Service).filter(Service.id == slot.service_id).first()
-        avg_duration = service.avg_duration_minutes if service else 15
+        services = {
+            service_id: (avg_duration, predictor)
+            for service_id, avg_duration, predictor in db.query(
+                Service.id, Service.avg_duration_minutes, Service.predictor
+            ).filter(Service.id.in_({slot.service_id for slot in slots})).all()
+        }
         
-        # Get historical load data for similar slots
-        similar_slots = db.query(LoadHistory).join(Slot).filter(
-            Slot.service_id == slot.service_id,
-            Slot.start_time == slot.start_time,
-            LoadHistory.timestamp >= datetime.utcnow() - timedelta(days=30)
-        ).order_by(LoadHistory.timestamp.desc()).limit(10).all()
+        # Forecast load with each service's predictor, one batch per predictor
+        predictors = [get_predictor(services.get(slot.service_id, (None, None))[1]) for slot in slots]
+        forecasts: List[Tuple[Optional[float], float]] = [(None, 0.0)] * len(slots)
+        for predictor in set(predictors):
+            rows = [row for row, slot_predictor in enumerate(predictors) if slot_predictor is predictor]
+            for row, forecast in zip(rows, predictor.forecast_many(db, [slots[row] for row in rows])):
+                forecasts[row] = forecast
         
-        if similar_slots:
-            # Use WMA on historical load percentages
-            load_percentages = [h.load_percentage for h in similar_slots]
-            predicted_load = PredictionAlgorithms.weighted_moving_average(load_percentages)
-            confidence = min(len(similar_slots) / 10.0, 1.0)  # More data = higher confidence
-        else:
-            # No historical data, use current load
-            predicted_load = (slot.booked_count / slot.capacity * 100) if slot.capacity > 0 else 0
-            confidence = 0.5
+        physical_ids = [slot.id for slot in slots if slot.id > 0]
+        queues = dict(db.query(Appointment.slot_id, func.count(Appointment.id)).filter(
+            Appointment.slot_id.in_(physical_ids),
+            Appointment.status == "CONFIRMED"
+        ).group_by(Appointment.slot_id).all()) if physical_ids else {}
         
-        # Calculate congestion score
-        congestion = predicted_load / 100.0
+        has_history = np.array([load is not None for load, _ in forecasts])
+        forecast_load = np.array([load or 0.0 for load, _ in forecasts])
+        forecast_confidence = np.array([confidence for _, confidence in forecasts])
+        booked = np.array([slot.booked_count or 0 for slot in slots], dtype=float)
+        capacity = np.array([slot.capacity for slot in slots], dtype=float)
+        queue = np.array([queues.get(slot.id, 0) for slot in slots], dtype=float)
+        avg_duration = np.array([services.get(slot.service_id, (None, None))[0] or 15 for slot in slots], dtype=float)
         
-        # Estimate wait time based on queue
-        current_queue = db.query(Appointment).filter(
-            Appointment.slot_id == slot_id,
-            Appointment.status == "CONFIRMED"
-        ).count()
+        # No historical data, use current load
+        current_load = np.divide(booked * 100, capacity, out=np.zeros_like(booked), where=capacity > 0)
+        predicted_load = np.where(has_history, forecast_load, current_load)
+        confidence = np.where(has_history, forecast_confidence, 0.5)
         
-        predicted_wait = int(current_queue * avg_duration * (1 + congestion * 0.3))
+        congestion = predicted_load / 100.0
+        predicted_wait = np.floor(queue * avg_duration * (1 + congestion * 0.3)).astype(int)
         
-        return predicted_wait, congestion, confidence
+        return [
+            (int(wait), float(score), float(conf), predictor.version)
+            for wait, score, conf, predictor in zip(predicted_wait, congestion, confidence, predictors)
+        ]
     
     @staticmethod
     def analyze_peak_hours(db: Session, service_id: int, days: int = 30) -> List[dict]:
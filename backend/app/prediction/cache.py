@@ -0,0 +1,202 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from db.database import run_in_session
+from db.models import Prediction, Slot
+from app.prediction.algorithms import PredictionAlgorithms
+from app.queue.engine import queue_engine
+from app.slots.cache import slot_cache
+from app.slots.schedule import MAX_VIRTUAL_SERVICE_ID, slot_schedule
+from core.config import settings
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import time
+
+class PredictionCache:
+    """In-memory slot predictions in front of PredictionAlgorithms.
+
+    A slot's prediction is computed on the first lookup and then served from
+    a bounded LRU map until it is older than the TTL or the slot's queue
+    changes. Lookups never write: predictions computed since the last
+    snapshot are inserted into the predictions table in one batch by a
+    background stage, so the table keeps a history at a fixed cadence
+    instead of one row per page view. Committed slot edits, schedule
+    changes and a virtual slot getting its row drop the affected entries.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # slot_id -> (expires_at, prediction, service_id)
+        self.entries: "OrderedDict[int, Tuple[float, Prediction, int]]" = OrderedDict()
+        # slot_id -> newest prediction not yet in the predictions table
+        self.pending: Dict[int, Prediction] = {}
+        # Bumped on every invalidation so a computation that raced one is not cached
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def get(self, db: Session, slot_id: int) -> Optional[Prediction]:
+        """Get a slot's prediction, or None if the slot does not exist."""
+        entry = self.entries.get(slot_id)
+        if entry and entry[0] >= time.time():
+            self.hits += 1
+            self.entries.move_to_end(slot_id)
+            return entry[1]
+        slot = slot_cache.get(db, slot_id)
+        if slot is None:
+            return None
+        return self.get_many(db, [slot])[0]
+
+    def get_many(self, db: Session, slots: List[Slot]) -> List[Prediction]:
+        """Get predictions for slots in order, computing every miss in one batch."""
+        now = time.time()
+        found: Dict[int, Prediction] = {}
+        for slot in slots:
+            entry = self.entries.get(slot.id)
+            if entry and entry[0] >= now:
+                self.hits += 1
+                self.entries.move_to_end(slot.id)
+                found[slot.id] = entry[1]
+
+        missing = list({slot.id: slot for slot in slots if slot.id not in found}.values())
+        if missing:
+            self.misses += len(missing)
+            computing_version = self.version
+            created_at = datetime.utcnow()
+            for slot, (wait_time, congestion, confidence, algorithm_version) in zip(
+                missing, PredictionAlgorithms.predict_many(db, missing)
+            ):
+                prediction = found[slot.id] = Prediction(
+                    slot_id=slot.id,
+                    predicted_wait_minutes=wait_time,
+                    congestion_score=congestion,
+                    confidence_score=confidence,
+                    algorithm_version=algorithm_version,
+                    created_at=created_at
+                )
+                # A queue change landed while computing and may not be in what we read
+                if self.version == computing_version:
+                    self._remember(prediction, slot.service_id, now + self.ttl_seconds)
+
+        return [found[slot.id] for slot in slots]
+
+    def _remember(self, prediction: Prediction, service_id: int, expires_at: float) -> None:
+        self.entries[prediction.slot_id] = (expires_at, prediction, service_id)
+        self.entries.move_to_end(prediction.slot_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        if prediction.slot_id > 0:
+            # Virtual slots have no row to attach a stored prediction to
+            self.pending[prediction.slot_id] = prediction
+
+    def invalidate(self, slot_id: int, from_position: Optional[int] = None) -> None:
+        """Drop a slot's prediction, e.g. after its queue changed."""
+        self.entries.pop(slot_id, None)
+        self.version += 1
+
+    def clear(self) -> None:
+        """Drop every cached prediction."""
+        self.entries.clear()
+        self.version += 1
+
+    def slot_changed(self, service_id: Optional[int], slot: Optional[Slot]) -> None:
+        """Drop predictions a committed slot or schedule change made stale."""
+        if service_id is None:
+            self.clear()
+            return
+        if slot is None:
+            for slot_id in [slot_id for slot_id, entry in self.entries.items() if entry[2] == service_id]:
+                del self.entries[slot_id]
+            self.version += 1
+            return
+        self.invalidate(slot.id)
+        if slot.id > 0 and slot.service_id <= MAX_VIRTUAL_SERVICE_ID:
+            # The slot may have been cached under its virtual id before it had a row
+            self.invalidate(slot_schedule.virtual_slot_id(slot.service_id, slot.date, slot.start_time))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached_predictions": len(self.entries),
+            "pending_snapshot": len(self.pending)
+        }
+
+    def persist(self, db: Session, predictions: List[Prediction]) -> int:
+        """Insert a snapshot of predictions in one statement and return how many were written."""
+        # Slots deleted since their prediction was computed would fail the foreign key
+        existing = {slot_id for (slot_id,) in db.query(Slot.id).filter(
+            Slot.id.in_([prediction.slot_id for prediction in predictions])
+        ).all()}
+        rows = [
+            {
+                "slot_id": prediction.slot_id,
+                "predicted_wait_minutes": prediction.predicted_wait_minutes,
+                "congestion_score": prediction.congestion_score,
+                "confidence_score": prediction.confidence_score,
+                "algorithm_version": prediction.algorithm_version,
+                "created_at": prediction.created_at
+            }
+            for prediction in predictions if prediction.slot_id in existing
+        ]
+        if rows:
+            db.execute(insert(Prediction), rows)
+        return len(rows)
+
+    async def flush(self) -> int:
+        """Write the pending snapshot now."""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, {}
+        try:
+            return await run_in_session(self.persist, list(pending.values()))
+        except Exception:
+            # Keep them for the next snapshot, unless a newer prediction replaced them
+            for slot_id, prediction in pending.items():
+                self.pending.setdefault(slot_id, prediction)
+            raise
+
+    def start(self) -> None:
+        """Start the snapshot stage on the running loop."""
+        if self.task is not None:
+            return
+        self.task = asyncio.get_running_loop().create_task(self._snapshot_forever())
+
+    async def stop(self) -> None:
+        """Stop the snapshot stage and write what is still pending."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Prediction snapshot warning: {e}")
+
+    async def _snapshot_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PREDICTION_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Prediction snapshot warning: {e}")
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+)
+
+# A committed booking, cancellation or check-in changes the slot's queue and load
+queue_engine.listeners.append(prediction_cache.invalidate)
+# So do capacity edits, schedule changes and a virtual slot's first booking
+slot_cache.listeners.append(prediction_cache.slot_changed)
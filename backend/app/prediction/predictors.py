@@ -0,0 +1,235 @@
+from sqlalchemy.orm import Session
+from db.models import ForecastState, Slot
+from app.prediction.aggregates import HISTORY_WINDOW, LoadAggregateService
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from abc import ABC, abstractmethod
+import json
+
+class LoadPredictor(ABC):
+    """Forecasts a slot's load percentage from the history of its time of day.
+
+    Services pick a predictor by name (Service.predictor); its version is
+    stored as Prediction.algorithm_version.
+    """
+
+    name = ""
+    version = ""
+
+    @abstractmethod
+    def forecast_many(self, db: Session, slots: List[Slot]) -> List[Tuple[Optional[float], float]]:
+        """(predicted load or None without history, confidence) for each slot, in order."""
+
+
+class WMAPredictor(LoadPredictor):
+    """Weighted moving average over the last HISTORY_WINDOW days of the same weekday and time."""
+
+    name = "wma"
+    version = "WMA_v1"
+
+    def forecast_many(self, db: Session, slots: List[Slot]) -> List[Tuple[Optional[float], float]]:
+        history_cutoff = date.today() - timedelta(days=30)
+        aggregates = LoadAggregateService.get_many(
+            db, {(slot.service_id, slot.date.weekday(), slot.start_time) for slot in slots}
+        )
+        forecasts = []
+        for slot in slots:
+            aggregate = aggregates.get((slot.service_id, slot.date.weekday(), slot.start_time))
+            if not aggregate or not aggregate.sample_count or not aggregate.last_date or aggregate.last_date < history_cutoff:
+                # Time of day has not run recently
+                forecasts.append((None, 0.0))
+                continue
+            count = aggregate.sample_count
+            # Weights run 1..n from the oldest day to the newest, so they sum to n(n + 1) / 2
+            forecasts.append((aggregate.weighted_sum / (count * (count + 1) / 2), min(count / HISTORY_WINDOW, 1.0)))
+        return forecasts
+
+
+class StreamingPredictor(LoadPredictor):
+    """An online model whose whole state is a few floats per (service, start time).
+
+    Observations are a time slot's daily load. The sampler reports the same
+    day many times, so the latest value of the current day is held as
+    pending and folded into the model once a later day arrives; every
+    update is constant time.
+    """
+
+    # Days of history after which confidence reaches 1.0
+    warmup = HISTORY_WINDOW
+
+    @abstractmethod
+    def initial(self, value: float, weekday: int) -> dict:
+        """Model state after the first observation."""
+
+    @abstractmethod
+    def update(self, model: dict, value: float, weekday: int) -> dict:
+        """Model state after one more observation."""
+
+    @abstractmethod
+    def predict(self, model: dict, weekday: int) -> float:
+        """One-day-ahead load forecast."""
+
+    def observe(self, state: dict, slot_date: date, value: float) -> dict:
+        """Record a load sample for a day and return the new state."""
+        if state.get("date", "") > slot_date.isoformat():
+            # Days already folded or pending are not revisited
+            return state
+        state = self._settle(state, slot_date)
+        return {**state, "date": slot_date.isoformat(), "pending": value}
+
+    def _settle(self, state: dict, slot_date: date) -> dict:
+        # Fold the pending day into the model once a later day is reached
+        pending_date = state.get("date")
+        if pending_date is None or pending_date >= slot_date.isoformat():
+            return state
+        weekday = date.fromisoformat(pending_date).weekday()
+        model = state.get("model")
+        model = self.initial(state["pending"], weekday) if model is None else self.update(model, state["pending"], weekday)
+        return {"model": model, "days": state.get("days", 0) + 1}
+
+    def forecast_many(self, db: Session, slots: List[Slot]) -> List[Tuple[Optional[float], float]]:
+        states = ForecastStateService.get_many(db, {(slot.service_id, slot.start_time) for slot in slots})
+        forecasts = []
+        for slot in slots:
+            state = states.get((slot.service_id, slot.start_time), {}).get(self.name, {})
+            # History before the slot's own day only
+            state = self._settle(state, slot.date)
+            if state.get("model") is None:
+                forecasts.append((None, 0.0))
+                continue
+            load = min(max(self.predict(state["model"], slot.date.weekday()), 0.0), 100.0)
+            forecasts.append((load, min(state["days"] / self.warmup, 1.0)))
+        return forecasts
+
+
+class EWMAPredictor(StreamingPredictor):
+    """Exponentially weighted moving average: one level, newest day weighted alpha."""
+
+    name = "ewma"
+    version = "EWMA_v1"
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+
+    def initial(self, value: float, weekday: int) -> dict:
+        return {"level": value}
+
+    def update(self, model: dict, value: float, weekday: int) -> dict:
+        return {"level": self.alpha * value + (1 - self.alpha) * model["level"]}
+
+    def predict(self, model: dict, weekday: int) -> float:
+        return model["level"]
+
+
+class HoltPredictor(StreamingPredictor):
+    """Double exponential smoothing: level plus trend, for loads that drift over weeks."""
+
+    name = "holt"
+    version = "HOLT_v1"
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.1):
+        self.alpha = alpha
+        self.beta = beta
+
+    def initial(self, value: float, weekday: int) -> dict:
+        return {"level": value, "trend": 0.0}
+
+    def update(self, model: dict, value: float, weekday: int) -> dict:
+        level = self.alpha * value + (1 - self.alpha) * (model["level"] + model["trend"])
+        trend = self.beta * (level - model["level"]) + (1 - self.beta) * model["trend"]
+        return {"level": level, "trend": trend}
+
+    def predict(self, model: dict, weekday: int) -> float:
+        return model["level"] + model["trend"]
+
+
+class HoltWintersPredictor(StreamingPredictor):
+    """Triple exponential smoothing: level, trend and an additive weekly season by weekday."""
+
+    name = "holt_winters"
+    version = "HW_WEEKLY_v1"
+    warmup = 21  # Three weeks to see every weekday a few times
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.05, gamma: float = 0.2):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+
+    def initial(self, value: float, weekday: int) -> dict:
+        return {"level": value, "trend": 0.0, "season": [0.0] * 7}
+
+    def update(self, model: dict, value: float, weekday: int) -> dict:
+        season = list(model["season"])
+        level = self.alpha * (value - season[weekday]) + (1 - self.alpha) * (model["level"] + model["trend"])
+        trend = self.beta * (level - model["level"]) + (1 - self.beta) * model["trend"]
+        season[weekday] = self.gamma * (value - level) + (1 - self.gamma) * season[weekday]
+        return {"level": level, "trend": trend, "season": season}
+
+    def predict(self, model: dict, weekday: int) -> float:
+        return model["level"] + model["trend"] + model["season"][weekday]
+
+
+# Predictors a service can select, by name
+PREDICTORS: Dict[str, LoadPredictor] = {
+    predictor.name: predictor
+    for predictor in (WMAPredictor(), EWMAPredictor(), HoltPredictor(), HoltWintersPredictor())
+}
+DEFAULT_PREDICTOR = "wma"
+
+def get_predictor(name: Optional[str]) -> LoadPredictor:
+    """Look up a predictor, falling back to the default for unknown names."""
+    return PREDICTORS.get(name or DEFAULT_PREDICTOR, PREDICTORS[DEFAULT_PREDICTOR])
+
+
+class ForecastStateService:
+    """Streaming predictor state, one JSON row per (service, start time) holding every predictor's model."""
+
+    @staticmethod
+    def _rows(db: Session, keys: Set[Tuple[int, time]]) -> Dict[Tuple[int, time], ForecastState]:
+        if not keys:
+            return {}
+        rows = db.query(ForecastState).filter(
+            ForecastState.service_id.in_({key[0] for key in keys}),
+            ForecastState.start_time.in_({key[1] for key in keys})
+        )
+        return {
+            (row.service_id, row.start_time): row
+            for row in rows if (row.service_id, row.start_time) in keys
+        }
+
+    @staticmethod
+    def get_many(db: Session, keys: Iterable[Tuple[int, time]]) -> Dict[Tuple[int, time], dict]:
+        """Get decoded states for (service_id, start_time) keys."""
+        return {
+            key: json.loads(row.state)
+            for key, row in ForecastStateService._rows(db, set(keys)).items()
+        }
+
+    @staticmethod
+    def record(db: Session, samples: List[Tuple[int, date, time, float]]) -> int:
+        """Feed (service_id, slot_date, start_time, load_percentage) samples, oldest first, to every streaming predictor."""
+        if not samples:
+            return 0
+        rows = ForecastStateService._rows(db, {(service_id, start_time) for service_id, _, start_time, _ in samples})
+        streaming = [predictor for predictor in PREDICTORS.values() if isinstance(predictor, StreamingPredictor)]
+        for service_id, slot_date, start_time, load_percentage in samples:
+            row = rows.get((service_id, start_time))
+            if row is None:
+                row = rows[(service_id, start_time)] = ForecastState(
+                    service_id=service_id,
+                    start_time=start_time,
+                    state="{}"
+                )
+                db.add(row)
+            state = json.loads(row.state)
+            for predictor in streaming:
+                state[predictor.name] = predictor.observe(state.get(predictor.name, {}), slot_date, load_percentage or 0.0)
+            row.state = json.dumps(state)
+        db.flush()
+        return len(samples)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute every state by replaying load_history in time order."""
+        db.query(ForecastState).delete(synchronize_session=False)
+        return ForecastStateService.record(db, LoadAggregateService.history_samples(db))
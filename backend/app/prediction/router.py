@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from db.database import get_db
-from app.prediction.schemas import PredictionResponse, PeakHourAnalysis
+from db.database import DbSession, get_session, run_db
+from app.prediction.schemas import BatchPredictionRequest, PredictionResponse, PeakHourAnalysis
 from app.prediction.service import PredictionService
 from app.auth.dependencies import get_current_user
 from db.models import User
@@ -12,16 +11,25 @@ router = APIRouter()
 async def get_slot_prediction(
     slot_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get prediction for a specific slot."""
-    return PredictionService.get_slot_prediction(db, slot_id)
+    return await run_db(db, PredictionService.get_slot_prediction, slot_id)
+
+@router.post("/batch", response_model=list[PredictionResponse])
+async def get_batch_predictions(
+    batch: BatchPredictionRequest,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Get predictions for many slots, or all slots of a service over a date range, at once."""
+    return await run_db(db, PredictionService.get_batch_predictions, batch)
 
 @router.get("/peak-hours", response_model=list[PeakHourAnalysis])
 async def get_peak_hours(
     service_id: int = Query(..., description="Service ID"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get peak hour analysis for a service."""
-    return PredictionService.get_peak_hours(db, service_id)
+    return await run_db(db, PredictionService.get_peak_hours, service_id)
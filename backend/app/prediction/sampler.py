@@ -0,0 +1,175 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from db.database import run_in_session
+from db.models import LoadHistory, Service, Slot
+from app.prediction.aggregates import LoadAggregateService
+from app.prediction.predictors import ForecastStateService
+from app.slots.cache import slot_cache
+from app.slots.schedule import slot_schedule
+from core.config import settings
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+import asyncio
+
+class LoadSampler:
+    """Records slot load into LoadHistory and keeps the table bounded.
+
+    Every LOAD_SAMPLE_INTERVAL_SECONDS the booked count and capacity of
+    every slot today, booked or not, are written as RAW rows with one
+    multi-row INSERT and folded into the per-(service, weekday, start time)
+    load aggregates and the streaming predictor states. Today's unbooked
+    virtual slots are given rows first so empty slots are sampled at zero.
+    A rollup stage then compacts RAW rows older than LOAD_RAW_RETENTION_HOURS
+    into one HOURLY row per slot and hour, HOURLY rows older than
+    LOAD_HOURLY_RETENTION_DAYS into one DAILY row per slot and day, and
+    deletes DAILY rows past LOAD_DAILY_RETENTION_DAYS. Each compaction
+    inserts the aggregates and deletes their sources in one transaction.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.last_rollup: Optional[datetime] = None
+
+    def sample(self, db: Session) -> int:
+        """Write one RAW sample per active slot today and return how many were written."""
+        now = datetime.utcnow()
+        unbooked = slot_schedule.expand(db, None, date.today(), date.today())
+        if unbooked and slot_schedule.materialize_many(db, unbooked):
+            for service_id in {slot.service_id for slot in unbooked}:
+                slot_cache.stage_invalidate(db, service_id)
+        active_slots = db.query(
+            Slot.id,
+            Slot.service_id,
+            Slot.date,
+            Slot.start_time,
+            Slot.booked_count,
+            Slot.capacity
+        ).join(Service, Service.id == Slot.service_id).filter(
+            Slot.date == date.today(),
+            Slot.capacity > 0,
+            Service.is_active == True
+        ).all()
+        if not active_slots:
+            return 0
+
+        samples = [
+            {
+                "slot_id": slot_id,
+                "booked_count": booked_count,
+                "capacity": capacity,
+                "load_percentage": booked_count * 100.0 / capacity,
+                "timestamp": now,
+                "resolution": "RAW"
+            }
+            for slot_id, _, _, _, booked_count, capacity in active_slots
+        ]
+        db.execute(insert(LoadHistory), samples)
+        history = [
+            (service_id, slot_date, start_time, sample["load_percentage"])
+            for (_, service_id, slot_date, start_time, _, _), sample in zip(active_slots, samples)
+        ]
+        LoadAggregateService.record(db, history)
+        ForecastStateService.record(db, history)
+        return len(samples)
+
+    def rollup(self, db: Session) -> dict:
+        """Compact old samples into coarser rows and drop expired ones."""
+        now = datetime.utcnow()
+        this_hour = now.replace(minute=0, second=0, microsecond=0)
+        today = this_hour.replace(hour=0)
+
+        # Cutoffs fall on bucket boundaries so every compacted bucket is complete
+        hourly = self._compact(
+            db, "RAW", "HOURLY",
+            this_hour - timedelta(hours=settings.LOAD_RAW_RETENTION_HOURS),
+            lambda ts: ts.replace(minute=0, second=0, microsecond=0)
+        )
+        daily = self._compact(
+            db, "HOURLY", "DAILY",
+            today - timedelta(days=settings.LOAD_HOURLY_RETENTION_DAYS),
+            lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)
+        )
+        expired = db.query(LoadHistory).filter(
+            LoadHistory.resolution == "DAILY",
+            LoadHistory.timestamp < today - timedelta(days=settings.LOAD_DAILY_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        return {"hourly": hourly, "daily": daily, "expired": expired}
+
+    def _compact(
+        self,
+        db: Session,
+        source: str,
+        target: str,
+        cutoff: datetime,
+        bucket: Callable[[datetime], datetime]
+    ) -> int:
+        # (slot_id, bucket start) -> [samples, booked sum, max capacity, load sum]
+        buckets: Dict[Tuple[int, datetime], list] = {}
+        rows = db.query(
+            LoadHistory.slot_id,
+            LoadHistory.timestamp,
+            LoadHistory.booked_count,
+            LoadHistory.capacity,
+            LoadHistory.load_percentage
+        ).filter(
+            LoadHistory.resolution == source,
+            LoadHistory.timestamp < cutoff
+        ).all()
+        for slot_id, timestamp, booked_count, capacity, load_percentage in rows:
+            totals = buckets.setdefault((slot_id, bucket(timestamp.replace(tzinfo=None))), [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += booked_count
+            totals[2] = max(totals[2], capacity)
+            totals[3] += load_percentage or 0.0
+        if not buckets:
+            return 0
+
+        aggregates = [
+            {
+                "slot_id": slot_id,
+                "timestamp": timestamp,
+                "booked_count": round(booked / samples),
+                "capacity": capacity,
+                "load_percentage": load / samples,
+                "resolution": target
+            }
+            for (slot_id, timestamp), (samples, booked, capacity, load) in buckets.items()
+        ]
+        db.execute(insert(LoadHistory), aggregates)
+        db.query(LoadHistory).filter(
+            LoadHistory.resolution == source,
+            LoadHistory.timestamp < cutoff
+        ).delete(synchronize_session=False)
+        return len(aggregates)
+
+    def start(self) -> None:
+        """Start sampling on the running loop."""
+        if self.task is not None:
+            return
+        self.task = asyncio.get_running_loop().create_task(self._sample_forever())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def _sample_forever(self) -> None:
+        while True:
+            try:
+                await run_in_session(self.sample)
+                now = datetime.utcnow()
+                if self.last_rollup is None or now - self.last_rollup >= timedelta(seconds=settings.LOAD_ROLLUP_INTERVAL_SECONDS):
+                    await run_in_session(self.rollup)
+                    self.last_rollup = now
+            except Exception as e:
+                print(f"Load sampling warning: {e}")
+            await asyncio.sleep(settings.LOAD_SAMPLE_INTERVAL_SECONDS)
+
+# Global load sampler instance
+load_sampler = LoadSampler()
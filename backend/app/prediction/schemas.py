@@ -1,9 +1,9 @@
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class PredictionResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # None when served from the prediction cache, which snapshots to the table separately
     slot_id: int
     predicted_wait_minutes: Optional[int]
     congestion_score: Optional[float]
@@ -14,6 +14,13 @@ class PredictionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BatchPredictionRequest(BaseModel):
+    # Either explicit slots, or every slot of a service over a date range
+    slot_ids: Optional[list[int]] = None
+    service_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None  # Defaults to start_date
+
 class PeakHourAnalysis(BaseModel):
     hour: int
     average_bookings: float
@@ -1,45 +1,79 @@
+from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from db.models import Prediction, Slot
 from app.prediction.algorithms import PredictionAlgorithms
-from app.prediction.schemas import PeakHourAnalysis
+from app.prediction.cache import prediction_cache
+from app.prediction.predictors import get_predictor
+from app.prediction.schemas import BatchPredictionRequest, PeakHourAnalysis
+from app.slots.schedule import slot_schedule
+from core.config import settings
+from datetime import datetime
 
 class PredictionService:
     """Service for prediction operations."""
     
     @staticmethod
-    def generate_prediction(db: Session, slot_id: int) -> Prediction:
-        """Generate and save prediction for a slot."""
-        wait_time, congestion, confidence = PredictionAlgorithms.predict_wait_time(db, slot_id)
-        
-        prediction = Prediction(
-            slot_id=slot_id,
-            predicted_wait_minutes=wait_time,
-            congestion_score=congestion,
-            confidence_score=confidence,
-            algorithm_version="WMA_v1"
-        )
-        
-        db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
-        
+    def get_slot_prediction(db: Session, slot_id: int) -> Prediction:
+        """Get the current prediction for a slot, from memory unless it expired or the queue changed."""
+        prediction = prediction_cache.get(db, slot_id)
+        if prediction is None:
+            return Prediction(
+                slot_id=slot_id,
+                predicted_wait_minutes=0,
+                congestion_score=0.0,
+                confidence_score=0.0,
+                algorithm_version=get_predictor(None).version,
+                created_at=datetime.utcnow()
+            )
         return prediction
     
     @staticmethod
-    def get_slot_prediction(db: Session, slot_id: int) -> Prediction:
-        """Get latest prediction for a slot."""
-        # Try to get recent prediction (within last hour)
-        from datetime import datetime, timedelta
-        recent_prediction = db.query(Prediction).filter(
-            Prediction.slot_id == slot_id,
-            Prediction.created_at >= datetime.utcnow() - timedelta(hours=1)
-        ).order_by(Prediction.created_at.desc()).first()
-        
-        if recent_prediction:
-            return recent_prediction
+    def get_batch_predictions(db: Session, batch: BatchPredictionRequest) -> list[Prediction]:
+        """
+        Predict many slots in one pass: the slots listed in slot_ids, or every
+        physical and virtual slot of a service between start_date and end_date.
+        Cached predictions are reused and the rest are computed together.
+        """
+        max_slots = settings.PREDICTION_BATCH_MAX_SLOTS
+        too_many = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can predict at most {max_slots} slots"
+        )
+        if batch.slot_ids is not None:
+            slot_ids = list(dict.fromkeys(batch.slot_ids))
+            if len(slot_ids) > max_slots:
+                raise too_many
+            physical = {
+                slot.id: slot
+                for slot in db.query(Slot).filter(Slot.id.in_([sid for sid in slot_ids if sid > 0])).all()
+            }
+            slots = [
+                physical.get(slot_id) if slot_id > 0 else slot_schedule.get_slot(db, slot_id)
+                for slot_id in slot_ids
+            ]
+            slots = [slot for slot in slots if slot is not None]
+        elif batch.service_id is not None and batch.start_date is not None:
+            end_date = batch.end_date or batch.start_date
+            # One row past the limit is enough to reject a range, however wide
+            slots = db.query(Slot).filter(
+                Slot.service_id == batch.service_id,
+                Slot.date >= batch.start_date,
+                Slot.date <= end_date
+            ).limit(max_slots + 1).all()
+            if len(slots) > max_slots:
+                raise too_many
+            # Virtual slots only exist within the booking horizon
+            slots += slot_schedule.expand(db, batch.service_id, batch.start_date, end_date)
+            if len(slots) > max_slots:
+                raise too_many
+            slots.sort(key=lambda slot: (slot.date, slot.start_time))
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide slot_ids, or service_id and start_date"
+            )
         
-        # Generate new prediction if none exists
-        return PredictionService.generate_prediction(db, slot_id)
+        return prediction_cache.get_many(db, slots)
     
     @staticmethod
     def get_peak_hours(db: Session, service_id: int) -> list[PeakHourAnalysis]:
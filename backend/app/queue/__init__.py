@@ -0,0 +1 @@
+# Queue module
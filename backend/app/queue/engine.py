@@ -0,0 +1,186 @@
+from sqlalchemy.orm import Session
+from db.models import Appointment, Slot, WaitlistEntry
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import bisect
+
+class SlotQueue:
+    """Priority-ordered queue for a single slot.
+
+    Entries are kept sorted by (-priority_weight, sequence) so that higher
+    priority users come first and ties keep booking order. The booking
+    sequence is the appointment id, which only ever grows.
+
+    Positions are found by binary search in O(log n). Inserting and removing
+    shift the sorted list, which is O(n) but a single memmove of at most the
+    slot's capacity in pointers, cheaper at these sizes than a tree.
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int]] = []
+        self.entries: Dict[int, Tuple[int, int]] = {}
+        self.owners: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, entry_id: int) -> bool:
+        return entry_id in self.entries
+
+    def add(self, entry_id: int, priority_weight: int, owner_id: int = None) -> int:
+        """Insert an entry and return its 1-based position."""
+        if entry_id in self.entries:
+            return self.position(entry_id)
+        key = (-(priority_weight or 1), entry_id)
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.entries[entry_id] = key
+        self.owners[entry_id] = owner_id
+        return index + 1
+
+    def remove(self, entry_id: int) -> Optional[int]:
+        """Remove an entry and return the position it held."""
+        key = self.entries.pop(entry_id, None)
+        if key is None:
+            return None
+        self.owners.pop(entry_id, None)
+        index = bisect.bisect_left(self.keys, key)
+        del self.keys[index]
+        return index + 1
+
+    def position(self, entry_id: int) -> Optional[int]:
+        """Get the 1-based position of an entry."""
+        key = self.entries.get(entry_id)
+        if key is None:
+            return None
+        return bisect.bisect_left(self.keys, key) + 1
+
+    def position_for(self, priority_weight: int) -> int:
+        """Position a new entry with this priority would take."""
+        return bisect.bisect_right(self.keys, (-(priority_weight or 1), float("inf"))) + 1
+
+    def entries_from(self, position: int) -> List[Tuple[int, int, int]]:
+        """(entry_id, owner_id, position) at or after a 1-based position."""
+        start = max(position - 1, 0)
+        return [
+            (entry_id, self.owners.get(entry_id), start + offset + 1)
+            for offset, (_, entry_id) in enumerate(self.keys[start:])
+        ]
+
+
+class QueueEngine:
+    """In-memory queue ordering for all active slots.
+
+    The engine is rebuilt from its table on startup and kept in sync by the
+    write paths after they commit, so positions never need a per-row query
+    to resolve. Any model with slot_id, priority_weight, user_id and status
+    columns can be tracked; entries in active_status are queued. Slots
+    are forgotten once their day has passed.
+    """
+
+    def __init__(self, model=Appointment, active_status: str = "CONFIRMED"):
+        self.model = model
+        self.active_status = active_status
+        self.slots: Dict[int, SlotQueue] = {}
+        # slot_id -> slot date, for forgetting past slots
+        self.dates: Dict[int, date] = {}
+        self.pruned_on: Optional[date] = None
+        # Called with (slot_id, first changed position) after every add or remove
+        self.listeners: List[Callable[[int, Optional[int]], None]] = []
+
+    def rebuild(self, db: Session, from_date: date = None) -> int:
+        """Load active entries for active slots in a single query."""
+        if from_date is None:
+            from_date = date.today()
+
+        model = self.model
+        rows = db.query(
+            model.slot_id,
+            model.id,
+            model.priority_weight,
+            model.user_id
+        ).join(Slot, Slot.id == model.slot_id).filter(
+            Slot.date >= from_date,
+            model.status == self.active_status
+        ).all()
+
+        self.slots = {}
+        self.dates = dict(db.query(Slot.id, Slot.date).filter(Slot.date >= from_date).all())
+        for slot_id in self.dates:
+            self.slots[slot_id] = SlotQueue()
+
+        for slot_id, entry_id, priority_weight, user_id in rows:
+            self.slots[slot_id].add(entry_id, priority_weight, user_id)
+
+        return len(rows)
+
+    def get_queue(self, db: Session, slot_id: int) -> SlotQueue:
+        """Get the queue for a slot, loading it once if it is not tracked yet."""
+        if self.pruned_on != date.today():
+            self.prune(db)
+        queue = self.slots.get(slot_id)
+        if queue is None:
+            queue = SlotQueue()
+            for entry_id, priority_weight, user_id in self.entries_query(db, slot_id):
+                queue.add(entry_id, priority_weight, user_id)
+            self.slots[slot_id] = queue
+        return queue
+
+    def entries_query(self, db: Session, slot_id: int):
+        """(id, priority_weight, user_id) of a slot's active entries."""
+        model = self.model
+        return db.query(
+            model.id,
+            model.priority_weight,
+            model.user_id
+        ).filter(
+            model.slot_id == slot_id,
+            model.status == self.active_status
+        )
+
+    def add(self, slot_id: int, entry_id: int, priority_weight: int, user_id: int = None) -> int:
+        """Record a committed entry and return its position."""
+        queue = self.slots.setdefault(slot_id, SlotQueue())
+        position = queue.add(entry_id, priority_weight, user_id)
+        self._changed(slot_id, position)
+        return position
+
+    def remove(self, slot_id: int, entry_id: int) -> Optional[int]:
+        """Drop a committed removal and return the position it held."""
+        queue = self.slots.get(slot_id)
+        if queue is None:
+            return None
+        position = queue.remove(entry_id)
+        if position is not None:
+            self._changed(slot_id, position)
+        return position
+
+    def _changed(self, slot_id: int, position: int) -> None:
+        for listener in self.listeners:
+            listener(slot_id, position)
+
+    def evict(self, slot_id: int) -> None:
+        """Forget a slot so it is reloaded from the database on next use."""
+        self.slots.pop(slot_id, None)
+        self.dates.pop(slot_id, None)
+
+    def prune(self, db: Session) -> int:
+        """Forget slots whose day has passed or that no longer exist, and return how many."""
+        today = date.today()
+        undated = [slot_id for slot_id in self.slots if slot_id not in self.dates]
+        if undated:
+            self.dates.update(db.query(Slot.id, Slot.date).filter(Slot.id.in_(undated)).all())
+        stale = [
+            slot_id for slot_id in self.slots
+            if slot_id not in self.dates or self.dates[slot_id] < today
+        ]
+        for slot_id in stale:
+            self.evict(slot_id)
+        for slot_id in [slot_id for slot_id in self.dates if slot_id not in self.slots]:
+            del self.dates[slot_id]
+        self.pruned_on = today
+        return len(stale)
+
+# Global queue engine instances
+queue_engine = QueueEngine()
+waitlist_engine = QueueEngine(WaitlistEntry, "WAITING")
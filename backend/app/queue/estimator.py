@@ -0,0 +1,206 @@
+from sqlalchemy import update, case, func
+from sqlalchemy.orm import Session
+from db.database import run_in_session
+from db.models import Appointment, Counter, Service, Slot
+from app.queue.engine import queue_engine
+from core.config import settings
+from datetime import date
+from typing import Dict, Optional, Tuple
+import asyncio
+
+class WaitEstimator:
+    """Keeps Appointment.estimated_wait_minutes in step with the live queue.
+
+    Queue changes mark a slot dirty from the first position that moved, and
+    counter completions update a per-service running state (service time,
+    no-show rate, open counters). A background stage drains the dirty slots,
+    recomputes estimates from the in-memory queue and writes only the values
+    that changed, with one batched UPDATE per slot. Slots are forgotten once
+    their day has passed.
+    """
+
+    def __init__(self):
+        # service_id -> (minutes per appointment, no-show rate, active counters)
+        self.services: Dict[int, Tuple[float, float, int]] = {}
+        # slot_id -> service_id
+        self.slot_services: Dict[int, int] = {}
+        # slot_id -> slot date, for forgetting past slots
+        self.slot_dates: Dict[int, date] = {}
+        # slot_id -> {appointment_id: last written estimate}
+        self.written: Dict[int, Dict[int, int]] = {}
+        # slot_id -> first position that needs recomputing
+        self.dirty: Dict[int, int] = {}
+        # slot_id -> consecutive failed recomputations
+        self.failures: Dict[int, int] = {}
+        self.pruned_on: Optional[date] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def service_state(self, db: Session, service_id: int) -> Tuple[float, float, int]:
+        """Get the running state for a service, seeding it from the database once."""
+        state = self.services.get(service_id)
+        if state is None:
+            minutes = db.query(Service.avg_duration_minutes).filter(Service.id == service_id).scalar()
+            counters = db.query(func.count(Counter.id)).filter(
+                Counter.service_id == service_id,
+                Counter.is_active == True
+            ).scalar()
+            state = self.services[service_id] = (float(minutes or 15), 0.0, counters or 0)
+        return state
+
+    def estimate(self, db: Session, service_id: int, queue_position: int) -> int:
+        """Estimated wait in minutes for a queue position."""
+        minutes, no_show_rate, counters = self.service_state(db, service_id)
+        ahead = (queue_position - 1) * (1 - no_show_rate)
+        return int(round(ahead * minutes / max(counters, 1)))
+
+    def mark_dirty(self, slot_id: int, from_position: Optional[int] = 1) -> None:
+        """Schedule a slot for recomputation from a position onwards."""
+        from_position = from_position or 1
+        self.dirty[slot_id] = min(self.dirty.get(slot_id, from_position), from_position)
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def mark_service_dirty(self, service_id: int) -> None:
+        """Schedule every tracked slot of a service for recomputation."""
+        for slot_id, slot_service_id in self.slot_services.items():
+            if slot_service_id == service_id:
+                self.mark_dirty(slot_id)
+
+    def record_service(self, service_id: int, minutes: Optional[float], no_show: bool) -> None:
+        """Fold one finished appointment into the service's running state."""
+        state = self.services.get(service_id)
+        if state is None:
+            return
+        alpha = settings.WAIT_ESTIMATE_ALPHA
+        avg_minutes, no_show_rate, counters = state
+        if minutes is not None and not no_show:
+            avg_minutes += alpha * (minutes - avg_minutes)
+        no_show_rate += alpha * ((1.0 if no_show else 0.0) - no_show_rate)
+        self.services[service_id] = (avg_minutes, no_show_rate, counters)
+        self.mark_service_dirty(service_id)
+
+    def reset_service(self, service_id: int) -> None:
+        """Reseed a service after its duration or counters changed."""
+        self.services.pop(service_id, None)
+        self.mark_service_dirty(service_id)
+
+    def prune(self) -> None:
+        """Forget the tracked state of slots whose day has passed."""
+        today = date.today()
+        for slot_id in [slot_id for slot_id, slot_date in self.slot_dates.items() if slot_date < today]:
+            del self.slot_dates[slot_id]
+            self.slot_services.pop(slot_id, None)
+            self.written.pop(slot_id, None)
+            self.failures.pop(slot_id, None)
+        self.pruned_on = today
+
+    def recompute(self, db: Session, dirty: Dict[int, int]) -> int:
+        """Write changed estimates for dirty slots and return how many rows changed."""
+        if self.pruned_on != date.today():
+            self.prune()
+        unknown = [slot_id for slot_id in dirty if slot_id not in self.slot_services]
+        if unknown:
+            for slot_id, service_id, slot_date in db.query(Slot.id, Slot.service_id, Slot.date).filter(
+                Slot.id.in_(unknown)
+            ):
+                self.slot_services[slot_id] = service_id
+                self.slot_dates[slot_id] = slot_date
+
+        changed = 0
+        for slot_id, from_position in dirty.items():
+            slot_queue = queue_engine.slots.get(slot_id)
+            service_id = self.slot_services.get(slot_id)
+            if slot_queue is None or service_id is None:
+                continue
+
+            written = self.written.get(slot_id)
+            if written is None:
+                # Seed once with what is stored so unchanged rows are never rewritten
+                written = self.written[slot_id] = dict(db.query(
+                    Appointment.id,
+                    Appointment.estimated_wait_minutes
+                ).filter(
+                    Appointment.slot_id == slot_id,
+                    Appointment.status == "CONFIRMED"
+                ).all())
+            for appointment_id in [entry_id for entry_id in written if entry_id not in slot_queue]:
+                del written[appointment_id]
+
+            changes = {}
+            for appointment_id, _, position in slot_queue.entries_from(from_position):
+                wait = self.estimate(db, service_id, position)
+                if written.get(appointment_id) != wait:
+                    changes[appointment_id] = wait
+            if not changes:
+                continue
+
+            db.execute(
+                update(Appointment)
+                .where(Appointment.id.in_(list(changes)))
+                .values(estimated_wait_minutes=case(changes, value=Appointment.id))
+                .execution_options(synchronize_session=False)
+            )
+            written.update(changes)
+            changed += len(changes)
+        return changed
+
+    def start(self) -> None:
+        """Start the recomputation stage on the running loop."""
+        if self.task is not None:
+            return
+        self.wakeup = asyncio.Event()
+        if self.dirty:
+            self.wakeup.set()
+        self.task = asyncio.get_running_loop().create_task(self._recompute_forever())
+
+    async def stop(self) -> None:
+        """Stop the recomputation stage."""
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        self.wakeup = None
+
+    async def _recompute_forever(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            # Let bursts of queue changes collapse into one pass per slot
+            await asyncio.sleep(settings.WAIT_RECOMPUTE_INTERVAL_MS / 1000)
+            self.wakeup.clear()
+            dirty, self.dirty = self.dirty, {}
+            try:
+                await run_in_session(self.recompute, dirty)
+                for slot_id in dirty:
+                    self.failures.pop(slot_id, None)
+            except Exception as e:
+                print(f"Wait recomputation warning: {e}")
+                # Retry slot by slot so one failing slot cannot hold back the rest
+                for slot_id, from_position in dirty.items():
+                    await self._recompute_slot(slot_id, from_position)
+
+    async def _recompute_slot(self, slot_id: int, from_position: int) -> None:
+        # The rolled back pass may have recorded estimates it never wrote
+        self.written.pop(slot_id, None)
+        try:
+            await run_in_session(self.recompute, {slot_id: from_position})
+            self.failures.pop(slot_id, None)
+        except Exception as e:
+            self.written.pop(slot_id, None)
+            failures = self.failures[slot_id] = self.failures.get(slot_id, 0) + 1
+            if failures < settings.WAIT_RECOMPUTE_MAX_ATTEMPTS:
+                self.mark_dirty(slot_id, from_position)
+                return
+            # Retried again only when its queue next changes
+            del self.failures[slot_id]
+            print(f"Wait recomputation gave up on slot {slot_id} after {failures} attempts: {e}")
+
+# Global wait estimator instance
+wait_estimator = WaitEstimator()
+
+# Every committed queue change invalidates estimates from the position that moved
+queue_engine.listeners.append(wait_estimator.mark_dirty)
@@ -1,8 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 from db.models import Slot, Service, User
 from app.recommendations.schemas import SlotRecommendation
 from app.prediction.algorithms import PredictionAlgorithms
+from app.slots.cache import slot_cache
 from datetime import date, time as dt_time, datetime, timedelta
 from typing import List, Tuple
 
@@ -83,6 +83,16 @@ class RecommendationService:
         
         return min(score, 1.0), reasons
     
+    @staticmethod
+    def get_available_slots(db: Session, service_id: int, start_date: date, end_date: date) -> List[Slot]:
+        """Slots of a service with free capacity in a date range, served from the slot cache."""
+        return [
+            slot
+            for offset in range((end_date - start_date).days + 1)
+            for slot in slot_cache.get_day(db, service_id, start_date + timedelta(days=offset))
+            if slot.booked_count < slot.capacity
+        ]
+    
     @staticmethod
     def get_alternative_slots(
         db: Session,
@@ -91,7 +101,7 @@ class RecommendationService:
         limit: int = 5
     ) -> List[SlotRecommendation]:
         """Get alternative slot recommendations when preferred slot is full/crowded."""
-        original_slot = db.query(Slot).filter(Slot.id == slot_id).first()
+        original_slot = slot_cache.get(db, slot_id)
         if not original_slot:
             return []
         
@@ -99,15 +109,12 @@ class RecommendationService:
         date_range_start = original_slot.date - timedelta(days=3)
         date_range_end = original_slot.date + timedelta(days=7)
         
-        alternative_slots = db.query(Slot).filter(
-            and_(
-                Slot.service_id == original_slot.service_id,
-                Slot.date >= date_range_start,
-                Slot.date <= date_range_end,
-                Slot.id != slot_id,
-                Slot.booked_count < Slot.capacity  # Only available slots
+        alternative_slots = [
+            slot for slot in RecommendationService.get_available_slots(
+                db, original_slot.service_id, date_range_start, date_range_end
             )
-        ).all()
+            if slot.id != slot_id
+        ]
         
         # Score and rank alternatives
         recommendations = []
@@ -166,24 +173,13 @@ class RecommendationService:
             target_date = date.today()
         
         # Get all available slots for the service on the date
-        slots = db.query(Slot).filter(
-            and_(
-                Slot.service_id == service_id,
-                Slot.date == target_date,
-                Slot.booked_count < Slot.capacity
-            )
-        ).all()
+        slots = RecommendationService.get_available_slots(db, service_id, target_date, target_date)
         
         if not slots:
             # Try next 7 days
-            slots = db.query(Slot).filter(
-                and_(
-                    Slot.service_id == service_id,
-                    Slot.date > target_date,
-                    Slot.date <= target_date + timedelta(days=7),
-                    Slot.booked_count < Slot.capacity
-                )
-            ).all()
+            slots = RecommendationService.get_available_slots(
+                db, service_id, target_date + timedelta(days=1), target_date + timedelta(days=7)
+            )
         
         # Score and rank
         recommendations = []
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from db.database import get_db
+from db.database import DbSession, get_session, run_db, run_unit_of_work
 from app.services.schemas import ServiceCreate, ServiceUpdate, ServiceResponse
 from app.services.service import ServiceService
 from app.auth.dependencies import require_admin, get_current_user
@@ -12,44 +11,44 @@ router = APIRouter()
 async def create_service(
     service_data: ServiceCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Create a new service (Admin only)."""
-    return ServiceService.create_service(db, service_data)
+    return await run_unit_of_work(db, ServiceService.create_service, service_data)
 
 @router.get("/", response_model=list[ServiceResponse])
 async def list_services(
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get list of services (public endpoint)."""
-    return ServiceService.get_services(db, active_only)
+    return await run_db(db, ServiceService.get_services, active_only)
 
 @router.get("/{service_id}", response_model=ServiceResponse)
 async def get_service(
     service_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get service by ID."""
-    return ServiceService.get_service_by_id(db, service_id)
+    return await run_db(db, ServiceService.get_service_by_id, service_id)
 
 @router.put("/{service_id}", response_model=ServiceResponse)
 async def update_service(
     service_id: int,
     service_data: ServiceUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Update service (Admin only)."""
-    return ServiceService.update_service(db, service_id, service_data)
+    return await run_unit_of_work(db, ServiceService.update_service, service_id, service_data)
 
 @router.delete("/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_service(
     service_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Delete service (Admin only)."""
-    ServiceService.delete_service(db, service_id)
+    await run_unit_of_work(db, ServiceService.delete_service, service_id)
     return None
@@ -6,6 +6,7 @@ class ServiceBase(BaseModel):
     name: str
     description: Optional[str] = None
     avg_duration_minutes: int = 15
+    predictor: str = "wma"  # Load forecaster: wma, ewma, holt, holt_winters
 
 class ServiceCreate(ServiceBase):
     pass
@@ -15,6 +16,7 @@ class ServiceUpdate(BaseModel):
     description: Optional[str] = None
     avg_duration_minutes: Optional[int] = None
     is_active: Optional[bool] = None
+    predictor: Optional[str] = None
 
 class ServiceResponse(ServiceBase):
     id: int
@@ -1,6 +1,11 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from db.database import on_commit
 from db.models import Service
+from app.queue.estimator import wait_estimator
+from app.slots.cache import slot_cache
+from app.prediction.cache import prediction_cache
+from app.prediction.predictors import PREDICTORS
 from app.services.schemas import ServiceCreate, ServiceUpdate
 
 class ServiceService:
@@ -9,12 +14,24 @@ class ServiceService:
     @staticmethod
     def create_service(db: Session, service_data: ServiceCreate) -> Service:
         """Create a new service."""
+        ServiceService.check_predictor(service_data.predictor)
         new_service = Service(**service_data.model_dump())
         db.add(new_service)
-        db.commit()
+        db.flush()
         db.refresh(new_service)
+        
+        slot_cache.stage_invalidate(db, new_service.id)
         return new_service
     
+    @staticmethod
+    def check_predictor(name: str) -> None:
+        """Reject predictor names that are not registered."""
+        if name not in PREDICTORS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown predictor, choose one of: {', '.join(PREDICTORS)}"
+            )
+    
     @staticmethod
     def get_service_by_id(db: Session, service_id: int) -> Service:
         """Get service by ID."""
@@ -39,10 +56,20 @@ class ServiceService:
         """Update service."""
         service = ServiceService.get_service_by_id(db, service_id)
         update_data = service_data.model_dump(exclude_unset=True)
+        if "predictor" in update_data:
+            ServiceService.check_predictor(update_data["predictor"])
         for field, value in update_data.items():
             setattr(service, field, value)
-        db.commit()
+        db.flush()
         db.refresh(service)
+        
+        if "avg_duration_minutes" in update_data:
+            on_commit(db, lambda: wait_estimator.reset_service(service_id))
+        if "is_active" in update_data:
+            slot_cache.stage_invalidate(db, service_id)
+        if "predictor" in update_data:
+            # Cached predictions were made by the previous predictor
+            on_commit(db, prediction_cache.clear)
         return service
     
     @staticmethod
@@ -50,4 +77,6 @@ class ServiceService:
         """Soft delete service."""
         service = ServiceService.get_service_by_id(db, service_id)
         service.is_active = False
-        db.commit()
+        db.flush()
+        
+        slot_cache.stage_invalidate(db, service_id)
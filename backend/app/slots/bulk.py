@@ -0,0 +1,112 @@
+from db.database import SessionLocal, bulk_insert_ignore, run_in_session
+from db.models import Slot
+from app.slots.service import SlotService
+from app.slots.cache import slot_cache
+from core.config import settings
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Optional
+import asyncio
+
+class SlotBulkCreator:
+    """Runs large bulk slot creations as background jobs.
+
+    Rows are generated lazily and written SLOT_BULK_CHUNK_SIZE at a time,
+    each chunk in its own short transaction, so memory use and lock time
+    stay the same however long the date range is. Existing rows are
+    skipped, which also makes a failed job safe to run again.
+    With DB_MODE=sync each chunk runs on a worker thread with its own
+    session, so a long job never blocks the event loop; with DB_MODE=async
+    the chunks go over the async driver.
+    """
+
+    def __init__(self):
+        # job_id -> progress, as returned by get()
+        self.jobs: Dict[int, dict] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.next_job_id = 1
+
+    def start(
+        self,
+        service_id: int,
+        start_date: date,
+        end_date: date,
+        time_slots: list[tuple],
+        capacity: int,
+        created_by: int
+    ) -> dict:
+        """Start creating slots on the running loop and return the new job."""
+        self._prune()
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        job = self.jobs[job_id] = {
+            "job_id": job_id,
+            "service_id": service_id,
+            "status": "RUNNING",
+            "total": SlotService.count_slot_rows(start_date, end_date, time_slots),
+            "processed": 0,
+            "created": 0,
+            "error": None,
+            "started_at": datetime.utcnow(),
+            "finished_at": None
+        }
+        rows = SlotService.iter_slot_rows(service_id, start_date, end_date, time_slots, capacity, created_by)
+        self.tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job, rows))
+        return job
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Get a job's progress."""
+        return self.jobs.get(job_id)
+
+    async def stop(self) -> None:
+        """Cancel running jobs. Chunks already committed are kept."""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+
+    async def _run(self, job: dict, rows) -> None:
+        try:
+            while True:
+                chunk = list(islice(rows, settings.SLOT_BULK_CHUNK_SIZE))
+                if not chunk:
+                    break
+                job["created"] += await self._write(chunk)
+                slot_cache.invalidate_service(job["service_id"])
+                job["processed"] += len(chunk)
+            job["status"] = "COMPLETED"
+        except asyncio.CancelledError:
+            job["status"] = "CANCELLED"
+            raise
+        except Exception as e:
+            job["status"] = "FAILED"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow()
+            self.tasks.pop(job["job_id"], None)
+
+    async def _write(self, chunk: list) -> int:
+        if settings.DB_MODE == "async":
+            return await run_in_session(bulk_insert_ignore, Slot, chunk, len(chunk))
+        return await asyncio.to_thread(self._write_sync, chunk)
+
+    @staticmethod
+    def _write_sync(chunk: list) -> int:
+        # A sync session would run inline on the loop, so it gets a thread of its own
+        db = SessionLocal()
+        try:
+            created = bulk_insert_ignore(db, Slot, chunk, len(chunk))
+            db.commit()
+            return created
+        finally:
+            db.close()
+
+    def _prune(self) -> None:
+        # Forget the oldest finished jobs beyond SLOT_BULK_MAX_JOBS
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] != "RUNNING"]
+        for job_id in finished[:max(len(finished) - settings.SLOT_BULK_MAX_JOBS + 1, 0)]:
+            del self.jobs[job_id]
+
+# Global bulk slot creator instance
+slot_bulk_creator = SlotBulkCreator()
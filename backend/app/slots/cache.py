@@ -0,0 +1,186 @@
+from sqlalchemy.orm import Session
+from db.database import on_commit
+from db.models import Slot
+from app.slots.schedule import slot_schedule
+from core.config import settings
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+
+class SlotCache:
+    """Read-through cache of slot listings, one entry per (service_id, date).
+
+    An entry holds detached snapshots of that day's physical slots plus the
+    virtual slots expanded from the schedule, so listings, slot lookups and
+    availability checks are served from memory. Booking, cancel and admin
+    edits replace a slot's snapshot when their transaction commits; schedule
+    and service changes drop the affected days. Every change is stamped with
+    a new version number, and a day's version is the newest stamp in it, so
+    clients can revalidate a listing or fetch only the slots that changed.
+    """
+
+    def __init__(self, max_days: int):
+        self.max_days = max_days
+        # (service_id, date) -> {slot_id: snapshot}, in listing order
+        self.days: "OrderedDict[Tuple[int, date], Dict[int, Slot]]" = OrderedDict()
+        # (service_id, date) -> version the day was loaded at
+        self.day_loaded: Dict[Tuple[int, date], int] = {}
+        # physical slot_id -> (service_id, date)
+        self.slot_days: Dict[int, Tuple[int, date]] = {}
+        # Seeded from the clock so versions keep increasing across restarts
+        self.version = int(time.time() * 1000)
+        self.hits = 0
+        self.misses = 0
+        self.loaded_on: Optional[date] = None
+        # Called with (service_id, slot) after a committed slot change; slot is None
+        # when a whole service changed, and both are None when everything did
+        self.listeners: List[Callable[[Optional[int], Optional[Slot]], None]] = []
+
+    @staticmethod
+    def snapshot(slot: Slot) -> Slot:
+        """Copy a slot into a detached instance that later flushes cannot change."""
+        copy = Slot(**{column.key: getattr(slot, column.key) for column in Slot.__table__.columns})
+        copy.is_virtual = slot.is_virtual
+        return copy
+
+    @staticmethod
+    def day_query(db: Session, service_id: int, slot_date: date):
+        """A service's physical slots on one day."""
+        return db.query(Slot).filter(Slot.service_id == service_id, Slot.date == slot_date)
+
+    def _next_version(self) -> int:
+        self.version += 1
+        return self.version
+
+    def _check_date(self) -> None:
+        # Virtual slots depend on today's horizon, so a new day starts from scratch
+        today = date.today()
+        if self.loaded_on != today:
+            self.clear()
+            self.loaded_on = today
+
+    def get_day(self, db: Session, service_id: int, slot_date: date) -> List[Slot]:
+        """Get a day's slots for a service, physical and virtual, ordered by start time."""
+        return self.get_versioned_day(db, service_id, slot_date)[2]
+
+    def get_versioned_day(self, db: Session, service_id: int, slot_date: date) -> Tuple[int, int, List[Slot]]:
+        """
+        Get a day's slots with (version, loaded_version, slots).
+        Slots stamped after loaded_version changed since the day was loaded;
+        anything older than loaded_version needs the whole day.
+        """
+        self._check_date()
+        key = (service_id, slot_date)
+        day = self.days.get(key)
+        if day is not None:
+            self.hits += 1
+            self.days.move_to_end(key)
+            loaded_version = self.day_loaded[key]
+            version = max((slot.version for slot in day.values()), default=loaded_version)
+            return version, loaded_version, list(day.values())
+
+        self.misses += 1
+        loading_version = self.version
+        slots = self.day_query(db, service_id, slot_date).all()
+        slots += slot_schedule.expand(db, service_id, slot_date, slot_date)
+        slots.sort(key=lambda slot: slot.start_time)
+        if self.version != loading_version:
+            # A commit landed while loading and may not be in what we read
+            version = self._next_version()
+            return version, version, slots
+
+        version = self._next_version()
+        day = {}
+        for slot in slots:
+            snapshot = self.snapshot(slot)
+            snapshot.version = version
+            day[snapshot.id] = snapshot
+            if snapshot.id > 0:
+                self.slot_days[snapshot.id] = key
+        self.days[key] = day
+        self.day_loaded[key] = version
+        while len(self.days) > self.max_days:
+            self._drop(next(iter(self.days)))
+        return version, version, list(day.values())
+
+    def get(self, db: Session, slot_id: int) -> Optional[Slot]:
+        """Get one slot's snapshot, loading the whole day it belongs to on a miss."""
+        self._check_date()
+        key = self.slot_days.get(slot_id)
+        if key is None:
+            parsed = slot_schedule.parse_virtual_slot_id(slot_id)
+            if parsed is not None:
+                key = parsed[:2]
+            else:
+                key = db.query(Slot.service_id, Slot.date).filter(Slot.id == slot_id).first()
+                if key is None:
+                    return None
+                key = tuple(key)
+        return next((slot for slot in self.get_day(db, *key) if slot.id == slot_id), None)
+
+    def put(self, slot: Slot) -> None:
+        """Replace a cached slot's snapshot with a committed one."""
+        slot.version = self._next_version()
+        self._changed(slot.service_id, slot)
+        key = (slot.service_id, slot.date)
+        day = self.days.get(key)
+        if day is None:
+            return
+        if slot.id not in day:
+            # First booking of a virtual slot; reload the day with its new row
+            self._drop(key)
+            return
+        day[slot.id] = slot
+
+    def stage_update(self, db: Session, slot: Slot) -> None:
+        """Update the cached slot once the current transaction commits."""
+        snapshot = self.snapshot(slot)
+        on_commit(db, lambda: self.put(snapshot))
+
+    def invalidate_service(self, service_id: int) -> None:
+        """Drop every cached day of a service, e.g. after its schedule changed."""
+        for key in [key for key in self.days if key[0] == service_id]:
+            self._drop(key)
+        self._next_version()
+        self._changed(service_id, None)
+
+    def stage_invalidate(self, db: Session, service_id: Optional[int] = None) -> None:
+        """Drop a service's days, or every day when service_id is None, once the transaction commits."""
+        if service_id is None:
+            on_commit(db, self.clear)
+        else:
+            on_commit(db, lambda: self.invalidate_service(service_id))
+
+    def clear(self) -> None:
+        """Drop everything."""
+        self.days.clear()
+        self.day_loaded.clear()
+        self.slot_days.clear()
+        self._next_version()
+        self._changed(None, None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached_days": len(self.days),
+            "cached_slots": sum(len(day) for day in self.days.values()),
+            "version": self.version
+        }
+
+    def _changed(self, service_id: Optional[int], slot: Optional[Slot]) -> None:
+        for listener in self.listeners:
+            listener(service_id, slot)
+
+    def _drop(self, key: Tuple[int, date]) -> None:
+        day = self.days.pop(key, None) or {}
+        self.day_loaded.pop(key, None)
+        for slot_id in day:
+            self.slot_days.pop(slot_id, None)
+
+# Global slot cache instance
+slot_cache = SlotCache(settings.SLOT_CACHE_MAX_DAYS)
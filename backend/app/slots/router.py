@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, status, Query
-from sqlalchemy.orm import Session
-from db.database import get_db
-from app.slots.schemas import SlotCreate, SlotUpdate, SlotResponse, SlotAvailability
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from db.database import DbSession, get_session, run_db, run_unit_of_work
+from app.slots.schemas import (
+    SlotCreate,
+    SlotUpdate,
+    SlotResponse,
+    SlotAvailability,
+    SlotCalendar,
+    SlotTemplateCreate,
+    SlotTemplateResponse,
+    ScheduleExceptionCreate,
+    ScheduleExceptionResponse
+)
 from app.slots.service import SlotService
 from app.auth.dependencies import require_admin, get_current_user
+from core.pagination import set_page_headers
 from db.models import User
 from datetime import date
 from typing import Optional
@@ -14,74 +24,145 @@ router = APIRouter()
 async def create_slot(
     slot_data: SlotCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Create a new slot (Admin only)."""
-    return SlotService.create_slot(db, slot_data, current_user.id)
+    return await run_unit_of_work(db, SlotService.create_slot, slot_data, current_user.id)
 
 @router.get("/", response_model=list[SlotResponse])
 async def list_slots(
+    response: Response,
     service_id: Optional[int] = Query(None),
     date: Optional[date] = Query(None),
-    status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    slot_status: Optional[str] = Query(None, alias="status"),
+    since_version: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: DbSession = Depends(get_session)
 ):
-    """Get list of slots with optional filters (public endpoint). Auto-generates slots if none exist for the requested date."""
+    """
+    Get list of slots with optional filters (public endpoint). Includes virtual slots from each service's schedule.
+    Listings for one service and date are versioned: the ETag honors If-None-Match, and
+    since_version returns only the slots changed after that version (X-Listing-Full: false).
+    Other listings are paged by cursor; pass X-Next-Cursor back as cursor for the next page.
+    """
+    if not (service_id and date):
+        if since_version is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="since_version requires service_id and date"
+            )
+        slots, next_cursor, estimated_total = await run_db(
+            db, SlotService.get_slots,
+            service_id=service_id, slot_date=date, status=slot_status, cursor=cursor, limit=limit
+        )
+        set_page_headers(response, next_cursor, estimated_total)
+        return slots
     
-    # If a specific service and date are requested, auto-generate slots if they don't exist
-    if service_id and date:
-        existing_slots = SlotService.get_slots(db, service_id=service_id, slot_date=date, status=None)
-        if not existing_slots:
-            # Auto-generate slots for this service and date
-            from datetime import time
-            from db.models import Slot
-            
-            time_slots = [
-                (time(9, 0), time(9, 30)), (time(9, 30), time(10, 0)), (time(10, 0), time(10, 30)),
-                (time(10, 30), time(11, 0)), (time(11, 0), time(11, 30)), (time(11, 30), time(12, 0)),
-                (time(14, 0), time(14, 30)), (time(14, 30), time(15, 0)), (time(15, 0), time(15, 30)),
-                (time(15, 30), time(16, 0)), (time(16, 0), time(16, 30)), (time(16, 30), time(17, 0)),
-            ]
-            
-            for start, end in time_slots:
-                slot = Slot(
-                    service_id=service_id,
-                    date=date,
-                    start_time=start,
-                    end_time=end,
-                    capacity=10,
-                    status="AVAILABLE"
-                )
-                db.add(slot)
-            
-            db.commit()
-    
-    return SlotService.get_slots(db, service_id=service_id, slot_date=date, status=status)
+    version, full, slots = await run_db(
+        db, SlotService.get_slot_listing, service_id, date, slot_status, since_version
+    )
+    headers = {
+        "ETag": f'"{version}"',
+        "X-Listing-Version": str(version),
+        "X-Listing-Full": "true" if full else "false"
+    }
+    if if_none_match and headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return slots
+
+@router.get("/calendar", response_model=SlotCalendar)
+async def get_slot_calendar(
+    service_id: int = Query(...),
+    month: str = Query(..., description="Month as YYYY-MM"),
+    db: DbSession = Depends(get_session)
+):
+    """Month-at-a-glance availability for a service as packed day x time arrays (public endpoint)."""
+    return await run_db(db, SlotService.get_calendar, service_id, month)
+
+@router.get("/templates", response_model=list[SlotTemplateResponse])
+async def list_slot_templates(
+    service_id: Optional[int] = Query(None),
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """List the recurring schedule that virtual slots are expanded from (Admin only)."""
+    return await run_db(db, SlotService.get_templates, service_id)
+
+@router.post("/templates", response_model=SlotTemplateResponse, status_code=status.HTTP_201_CREATED)
+async def create_slot_template(
+    template_data: SlotTemplateCreate,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Add a recurring slot to a service's schedule (Admin only)."""
+    return await run_unit_of_work(db, SlotService.create_template, template_data)
+
+@router.delete("/templates/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_slot_template(
+    template_id: int,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Remove a recurring slot from a service's schedule (Admin only)."""
+    await run_unit_of_work(db, SlotService.delete_template, template_id)
+    return None
+
+@router.get("/exceptions", response_model=list[ScheduleExceptionResponse])
+async def list_schedule_exceptions(
+    service_id: Optional[int] = Query(None),
+    from_date: Optional[date] = Query(None),
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """List schedule closures and capacity overrides (Admin only)."""
+    return await run_db(db, SlotService.get_exceptions, service_id, from_date)
+
+@router.post("/exceptions", response_model=ScheduleExceptionResponse, status_code=status.HTTP_201_CREATED)
+async def create_schedule_exception(
+    exception_data: ScheduleExceptionCreate,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Close or resize scheduled slots on a date, e.g. a holiday (Admin only)."""
+    return await run_unit_of_work(db, SlotService.create_exception, exception_data)
+
+@router.delete("/exceptions/{exception_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule_exception(
+    exception_id: int,
+    current_user: User = Depends(require_admin),
+    db: DbSession = Depends(get_session)
+):
+    """Remove a schedule exception (Admin only)."""
+    await run_unit_of_work(db, SlotService.delete_exception, exception_id)
+    return None
 
 @router.get("/{slot_id}", response_model=SlotResponse)
 async def get_slot(
     slot_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get slot by ID."""
-    return SlotService.get_slot_by_id(db, slot_id)
+    return await run_db(db, SlotService.get_cached_slot, slot_id)
 
 @router.get("/{slot_id}/availability", response_model=SlotAvailability)
 async def get_slot_availability(
     slot_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Get detailed slot availability information."""
-    return SlotService.get_slot_availability(db, slot_id)
+    return await run_db(db, SlotService.get_slot_availability, slot_id)
 
 @router.put("/{slot_id}", response_model=SlotResponse)
 async def update_slot(
     slot_id: int,
     slot_data: SlotUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_session)
 ):
     """Update slot (Admin only)."""
-    return SlotService.update_slot(db, slot_id, slot_data)
+    return await run_unit_of_work(db, SlotService.update_slot, slot_id, slot_data)
@@ -0,0 +1,225 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from db.database import bulk_insert_ignore
+from db.models import Service, Slot, SlotTemplate, ScheduleException
+from core.config import settings
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Used for services that have no active schedule templates
+DEFAULT_DAY_TEMPLATE = [
+    (time(9, 0), time(9, 30)), (time(9, 30), time(10, 0)), (time(10, 0), time(10, 30)),
+    (time(10, 30), time(11, 0)), (time(11, 0), time(11, 30)), (time(11, 30), time(12, 0)),
+    (time(14, 0), time(14, 30)), (time(14, 30), time(15, 0)), (time(15, 0), time(15, 30)),
+    (time(15, 30), time(16, 0)), (time(16, 0), time(16, 30)), (time(16, 30), time(17, 0)),
+]
+DEFAULT_CAPACITY = 10
+
+# Virtual slot ids pack (service_id, date, minute of day) into 31 bits, so they
+# fit the same 32-bit integer as physical ids. The date is stored modulo
+# VIRTUAL_ID_DAY_CYCLE and read back as the matching day in the window from
+# VIRTUAL_ID_DAYS_BEHIND days ago, which covers the booking horizon.
+VIRTUAL_ID_MINUTE_BITS = 11
+VIRTUAL_ID_DAY_BITS = 6
+VIRTUAL_ID_DAY_CYCLE = 1 << VIRTUAL_ID_DAY_BITS
+VIRTUAL_ID_DAYS_BEHIND = 16
+MAX_HORIZON_DAYS = VIRTUAL_ID_DAY_CYCLE - VIRTUAL_ID_DAYS_BEHIND
+MAX_VIRTUAL_SERVICE_ID = (1 << (31 - VIRTUAL_ID_DAY_BITS - VIRTUAL_ID_MINUTE_BITS)) - 1
+
+class SlotSchedule:
+    """Expands each service's recurring schedule into virtual slots.
+
+    A service's weekday templates (or DEFAULT_DAY_TEMPLATE), minus closures
+    and capacity overrides from schedule exceptions, describe its slots for
+    the next SLOT_HORIZON_DAYS. Those slots are only expanded in memory; a
+    Slot row is written the first time one is booked or an admin edits it.
+
+    A virtual slot has a negative id encoding (service_id, date, start_time),
+    so clients can read and book it exactly like a physical slot. The id fits
+    a signed 32-bit integer for services up to MAX_VIRTUAL_SERVICE_ID.
+    """
+
+    @staticmethod
+    def virtual_slot_id(service_id: int, slot_date: date, start_time: time) -> int:
+        """Encode a schedule position as a (negative) virtual slot id."""
+        if service_id > MAX_VIRTUAL_SERVICE_ID:
+            raise ValueError(f"Virtual slot ids support service ids up to {MAX_VIRTUAL_SERVICE_ID}")
+        day = slot_date.toordinal() % VIRTUAL_ID_DAY_CYCLE
+        minute = start_time.hour * 60 + start_time.minute
+        return -((((service_id << VIRTUAL_ID_DAY_BITS) | day) << VIRTUAL_ID_MINUTE_BITS) | minute)
+
+    @staticmethod
+    def parse_virtual_slot_id(slot_id: int) -> Optional[Tuple[int, date, time]]:
+        """Decode a virtual slot id, or return None if it is not a valid one."""
+        if slot_id >= 0 or -slot_id >= 1 << 31:
+            return None
+        service_and_day, minute = divmod(-slot_id, 1 << VIRTUAL_ID_MINUTE_BITS)
+        service_id, day = divmod(service_and_day, VIRTUAL_ID_DAY_CYCLE)
+        if minute >= 24 * 60:
+            return None
+        window_start = date.today() - timedelta(days=VIRTUAL_ID_DAYS_BEHIND)
+        slot_date = window_start + timedelta(days=(day - window_start.toordinal()) % VIRTUAL_ID_DAY_CYCLE)
+        return service_id, slot_date, time(*divmod(minute, 60))
+
+    def expand(
+        self,
+        db: Session,
+        service_id: int = None,
+        start_date: date = None,
+        end_date: date = None
+    ) -> List[Slot]:
+        """Return the unsaved virtual slots for a date range that have no physical row yet."""
+        today = date.today()
+        start_date = max(start_date or today, today)
+        horizon = min(settings.SLOT_HORIZON_DAYS, MAX_HORIZON_DAYS)
+        end_date = min(end_date or date.max, today + timedelta(days=horizon - 1))
+        if start_date > end_date:
+            return []
+
+        query = db.query(Service.id).filter(Service.is_active == True)
+        if service_id:
+            query = query.filter(Service.id == service_id)
+        service_ids = [sid for (sid,) in query.all()]
+        if not service_ids:
+            return []
+
+        templates: Dict[int, List[Tuple[Optional[int], time, time, int]]] = {}
+        for sid, weekday, start_time, end_time, capacity in self.templates_query(db, service_ids):
+            templates.setdefault(sid, []).append((weekday, start_time, end_time, capacity))
+
+        # (service_id or None, date, start_time or None) -> (is_closed, capacity)
+        exceptions: Dict[Tuple[Optional[int], date, Optional[time]], Tuple[bool, Optional[int]]] = {}
+        for sid, slot_date, start_time, is_closed, capacity in db.query(
+            ScheduleException.service_id,
+            ScheduleException.date,
+            ScheduleException.start_time,
+            ScheduleException.is_closed,
+            ScheduleException.capacity
+        ).filter(
+            ScheduleException.date >= start_date,
+            ScheduleException.date <= end_date,
+            or_(ScheduleException.service_id.in_(service_ids), ScheduleException.service_id == None)
+        ).all():
+            exceptions[(sid, slot_date, start_time)] = (is_closed, capacity)
+
+        existing = set(db.query(Slot.service_id, Slot.date, Slot.start_time).filter(
+            Slot.service_id.in_(service_ids),
+            Slot.date >= start_date,
+            Slot.date <= end_date
+        ).all())
+
+        slots = []
+        for sid in service_ids:
+            service_templates = templates.get(sid) or [
+                (None, start_time, end_time, DEFAULT_CAPACITY) for start_time, end_time in DEFAULT_DAY_TEMPLATE
+            ]
+            slot_date = start_date
+            while slot_date <= end_date:
+                for weekday, start_time, end_time, capacity in service_templates:
+                    if weekday is not None and weekday != slot_date.weekday():
+                        continue
+                    if (sid, slot_date, start_time) in existing:
+                        continue
+
+                    # Service-specific exceptions win over global ones, specific times over whole days
+                    exception = next((
+                        exceptions[key] for key in (
+                            (sid, slot_date, start_time), (None, slot_date, start_time),
+                            (sid, slot_date, None), (None, slot_date, None)
+                        ) if key in exceptions
+                    ), None)
+                    if exception is not None:
+                        is_closed, capacity_override = exception
+                        if is_closed:
+                            continue
+                        capacity = capacity_override or capacity
+
+                    slot = Slot(
+                        id=self.virtual_slot_id(sid, slot_date, start_time),
+                        service_id=sid,
+                        date=slot_date,
+                        start_time=start_time,
+                        end_time=end_time,
+                        capacity=capacity,
+                        booked_count=0,
+                        status="AVAILABLE"
+                    )
+                    slot.is_virtual = True
+                    slots.append(slot)
+                slot_date += timedelta(days=1)
+
+        slots.sort(key=lambda slot: (slot.date, slot.start_time, slot.service_id))
+        return slots
+
+    @staticmethod
+    def templates_query(db: Session, service_ids: List[int]):
+        """(service_id, weekday, start_time, end_time, capacity) of the services' active templates."""
+        return db.query(
+            SlotTemplate.service_id,
+            SlotTemplate.weekday,
+            SlotTemplate.start_time,
+            SlotTemplate.end_time,
+            SlotTemplate.capacity
+        ).filter(
+            SlotTemplate.service_id.in_(service_ids),
+            SlotTemplate.is_active == True
+        )
+
+    def get_slot(self, db: Session, slot_id: int) -> Optional[Slot]:
+        """Look up a physical slot, or the slot a virtual id refers to."""
+        if slot_id > 0:
+            return db.query(Slot).filter(Slot.id == slot_id).first()
+
+        parsed = self.parse_virtual_slot_id(slot_id)
+        if parsed is None:
+            return None
+        service_id, slot_date, start_time = parsed
+
+        slot = db.query(Slot).filter(
+            Slot.service_id == service_id,
+            Slot.date == slot_date,
+            Slot.start_time == start_time
+        ).first()
+        if slot:
+            return slot
+        return next((
+            slot for slot in self.expand(db, service_id, slot_date, slot_date)
+            if slot.start_time == start_time
+        ), None)
+
+    def materialize(self, db: Session, slot_id: int) -> Optional[int]:
+        """Return the physical id for a slot, writing the row for a virtual slot first.
+
+        Returns None if the id matches neither a slot nor the schedule.
+        """
+        slot = self.get_slot(db, slot_id)
+        if slot is None or not slot.is_virtual:
+            return slot.id if slot else None
+
+        # Concurrent first bookings of the same slot insert at most one row
+        self.materialize_many(db, [slot])
+        # A locking read sees the latest committed row, so under MySQL REPEATABLE READ
+        # it finds a row another transaction inserted after our snapshot was taken
+        return db.query(Slot.id).filter(
+            Slot.service_id == slot.service_id,
+            Slot.date == slot.date,
+            Slot.start_time == slot.start_time
+        ).with_for_update().scalar()
+
+    def materialize_many(self, db: Session, slots: List[Slot]) -> int:
+        """Write rows for virtual slots, skipping any that exist by now, and return how many were written."""
+        return bulk_insert_ignore(db, Slot, [
+            {
+                "service_id": slot.service_id,
+                "date": slot.date,
+                "start_time": slot.start_time,
+                "end_time": slot.end_time,
+                "capacity": slot.capacity,
+                "booked_count": 0,
+                "status": "AVAILABLE"
+            }
+            for slot in slots
+        ])
+
+# Global slot schedule instance
+slot_schedule = SlotSchedule()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import date, time, datetime
 
@@ -20,11 +20,51 @@ class SlotResponse(SlotBase):
     id: int
     booked_count: int
     status: str
+    created_at: Optional[datetime] = None
+    is_virtual: bool = False  # Not booked yet; id is negative until the first booking
+    
+    class Config:
+        from_attributes = True
+
+class SlotTemplateCreate(BaseModel):
+    service_id: int
+    weekday: Optional[int] = Field(None, ge=0, le=6)  # 0 = Monday, None = every day
+    start_time: time
+    end_time: time
+    capacity: int = 10
+
+class SlotTemplateResponse(SlotTemplateCreate):
+    id: int
+    is_active: bool
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ScheduleExceptionCreate(BaseModel):
+    service_id: Optional[int] = None  # None = every service
+    date: date
+    start_time: Optional[time] = None  # None = the whole day
+    is_closed: bool = True
+    capacity: Optional[int] = Field(None, gt=0)
+    reason: Optional[str] = None
+
+class ScheduleExceptionResponse(ScheduleExceptionCreate):
+    id: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class SlotCalendar(BaseModel):
+    """Month matrix: rows are days from first_date, columns are the start times in times."""
+    service_id: int
+    month: str  # YYYY-MM
+    first_date: date
+    times: list[str]  # HH:MM
+    remaining: list[list[Optional[int]]]  # Free places per [day][time], None where there is no slot
+    status: list[str]  # One code per time for each day: A available, C crowded, F full, - no slot
+
 class SlotAvailability(BaseModel):
     slot_id: int
     capacity: int
@@ -1,8 +1,27 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from db.models import Slot, Service
-from app.slots.schemas import SlotCreate, SlotUpdate, SlotAvailability
-from datetime import date
+from db.database import bulk_insert_ignore
+from db.models import Slot, Service, SlotTemplate, ScheduleException
+from app.slots.schemas import (
+    SlotCreate,
+    SlotUpdate,
+    SlotAvailability,
+    SlotCalendar,
+    SlotTemplateCreate,
+    ScheduleExceptionCreate
+)
+from app.slots.schedule import slot_schedule
+from app.slots.cache import slot_cache
+from core.config import settings
+from core.pagination import keyset_page, estimate_count, decode_cursor, encode_cursor, sort_key
+from datetime import date, timedelta
+import calendar
+from typing import Callable, Iterator, Optional, Tuple
+
+# One-character status codes used by the month calendar
+CALENDAR_STATUS_CODES = {"AVAILABLE": "A", "CROWDED": "C", "FULL": "F"}
 
 class SlotService:
     """Service for slot management operations."""
@@ -23,14 +42,33 @@ class SlotService:
             created_by=created_by
         )
         db.add(new_slot)
-        db.commit()
+        try:
+            db.flush()
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A slot already exists for this service at this date and time"
+            )
         db.refresh(new_slot)
+        
+        slot_cache.stage_update(db, new_slot)
         return new_slot
     
     @staticmethod
     def get_slot_by_id(db: Session, slot_id: int) -> Slot:
-        """Get slot by ID."""
-        slot = db.query(Slot).filter(Slot.id == slot_id).first()
+        """Get slot by ID. Negative ids are virtual slots from the schedule."""
+        slot = slot_schedule.get_slot(db, slot_id)
+        if not slot:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Slot not found"
+            )
+        return slot
+    
+    @staticmethod
+    def get_cached_slot(db: Session, slot_id: int) -> Slot:
+        """Get a read-only slot snapshot by ID from the availability cache."""
+        slot = slot_cache.get(db, slot_id)
         if not slot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -43,9 +81,15 @@ class SlotService:
         db: Session,
         service_id: int = None,
         slot_date: date = None,
-        status: str = None
-    ) -> list[Slot]:
-        """Get list of slots with filters."""
+        status: str = None,
+        cursor: str = None,
+        limit: int = 500
+    ) -> Tuple[list[Slot], Optional[str], int]:
+        """
+        Get a page of physical slots merged with the virtual slots expanded from the schedule,
+        ordered by (date, start_time, id). Returns (slots, next_cursor, estimated_total).
+        """
+        sort_columns = (Slot.date, Slot.start_time, Slot.id)
         query = db.query(Slot)
         
         if service_id:
@@ -55,17 +99,108 @@ class SlotService:
         if status:
             query = query.filter(Slot.status == status)
         
-        return query.order_by(Slot.date, Slot.start_time).all()
+        estimated_total = estimate_count(db, query)
+        slots, next_cursor = keyset_page(query, sort_columns, cursor, limit)
+        if status and status != "AVAILABLE":
+            return slots, next_cursor, estimated_total
+        
+        # Virtual slots only exist within the horizon, so they are merged in memory
+        virtual_slots = slot_schedule.expand(db, service_id, slot_date, slot_date)
+        estimated_total += len(virtual_slots)
+        if cursor:
+            after = decode_cursor(cursor, sort_columns)
+            virtual_slots = [slot for slot in virtual_slots if sort_key(slot, sort_columns) > after]
+        if next_cursor:
+            # Virtual slots past the last physical row belong to later pages
+            virtual_slots = [slot for slot in virtual_slots if sort_key(slot, sort_columns) < sort_key(slots[-1], sort_columns)]
+        
+        merged = sorted(slots + virtual_slots, key=lambda slot: sort_key(slot, sort_columns))
+        if len(merged) > limit:
+            merged = merged[:limit]
+            next_cursor = encode_cursor(sort_key(merged[-1], sort_columns))
+        return merged, next_cursor, estimated_total
+    
+    @staticmethod
+    def get_slot_listing(
+        db: Session,
+        service_id: int,
+        slot_date: date,
+        status: str = None,
+        since_version: int = None
+    ) -> Tuple[int, bool, list[Slot]]:
+        """
+        Get a service's slots for one date with the listing's version.
+        With since_version only the slots changed after it are returned, unless the
+        listing was reloaded since then and has to be sent whole. The status filter
+        only applies to whole listings, so clients also see slots that left it.
+        Returns (version, is_full_listing, slots).
+        """
+        version, loaded_version, slots = slot_cache.get_versioned_day(db, service_id, slot_date)
+        if since_version is not None and loaded_version <= since_version <= version:
+            return version, False, [slot for slot in slots if slot.version > since_version]
+        
+        if status:
+            slots = [slot for slot in slots if slot.status == status]
+        return version, True, slots
+    
+    @staticmethod
+    def get_calendar(db: Session, service_id: int, month: str) -> SlotCalendar:
+        """Pack a service's month of slots into a day x start time matrix of free places and status codes."""
+        try:
+            year, month_number = (int(part) for part in month.split("-"))
+            first_date = date(year, month_number, 1)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Month must be YYYY-MM"
+            )
+        days = calendar.monthrange(year, month_number)[1]
+        last_date = first_date + timedelta(days=days - 1)
+        
+        cells = db.query(
+            Slot.date,
+            Slot.start_time,
+            Slot.capacity - Slot.booked_count,
+            Slot.status
+        ).filter(
+            Slot.service_id == service_id,
+            Slot.date >= first_date,
+            Slot.date <= last_date
+        ).all()
+        cells += [
+            (slot.date, slot.start_time, slot.capacity, slot.status)
+            for slot in slot_schedule.expand(db, service_id, first_date, last_date)
+        ]
+        
+        times = sorted({start_time for _, start_time, _, _ in cells})
+        columns = {start_time: index for index, start_time in enumerate(times)}
+        remaining = [[None] * len(times) for _ in range(days)]
+        codes = [["-"] * len(times) for _ in range(days)]
+        for slot_date, start_time, free, slot_status in cells:
+            row, column = slot_date.day - 1, columns[start_time]
+            remaining[row][column] = max(free, 0)
+            codes[row][column] = CALENDAR_STATUS_CODES.get(slot_status, "-")
+        
+        return SlotCalendar(
+            service_id=service_id,
+            month=first_date.strftime("%Y-%m"),
+            first_date=first_date,
+            times=[start_time.strftime("%H:%M") for start_time in times],
+            remaining=remaining,
+            status=["".join(row) for row in codes]
+        )
     
     @staticmethod
     def update_slot(db: Session, slot_id: int, slot_data: SlotUpdate) -> Slot:
-        """Update slot."""
-        slot = SlotService.get_slot_by_id(db, slot_id)
+        """Update slot. A virtual slot is written as a physical row first."""
+        slot = SlotService.get_slot_by_id(db, slot_schedule.materialize(db, slot_id) or slot_id)
         update_data = slot_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(slot, field, value)
-        db.commit()
+        db.flush()
         db.refresh(slot)
+        
+        slot_cache.stage_update(db, slot)
         return slot
     
     @staticmethod
@@ -79,13 +214,11 @@ class SlotService:
             slot.status = "CROWDED"
         else:
             slot.status = "AVAILABLE"
-        
-        db.commit()
     
     @staticmethod
     def get_slot_availability(db: Session, slot_id: int) -> SlotAvailability:
-        """Get detailed slot availability information."""
-        slot = SlotService.get_slot_by_id(db, slot_id)
+        """Get detailed slot availability information, served from the slot cache."""
+        slot = SlotService.get_cached_slot(db, slot_id)
         
         available_count = slot.capacity - slot.booked_count
         load_percentage = (slot.booked_count / slot.capacity) * 100
@@ -108,6 +241,36 @@ class SlotService:
             congestion_level=congestion_level
         )
     
+    @staticmethod
+    def iter_slot_rows(
+        service_id: int,
+        start_date: date,
+        end_date: date,
+        time_slots: list[tuple],  # [(start_time, end_time), ...]
+        capacity: int,
+        created_by: int
+    ) -> Iterator[dict]:
+        """Yield the slot rows for a date range one at a time."""
+        current_date = start_date
+        while current_date <= end_date:
+            for start_time, end_time in time_slots:
+                yield {
+                    "service_id": service_id,
+                    "date": current_date,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "capacity": capacity,
+                    "booked_count": 0,
+                    "status": "AVAILABLE",
+                    "created_by": created_by
+                }
+            current_date += timedelta(days=1)
+    
+    @staticmethod
+    def count_slot_rows(start_date: date, end_date: date, time_slots: list[tuple]) -> int:
+        """Number of slot rows a bulk creation over a date range would generate."""
+        return max((end_date - start_date).days + 1, 0) * len(time_slots)
+    
     @staticmethod
     def bulk_create_slots(
         db: Session,
@@ -116,9 +279,13 @@ class SlotService:
         end_date: date,
         time_slots: list[tuple],  # [(start_time, end_time), ...]
         capacity: int,
-        created_by: int
-    ) -> list[Slot]:
-        """Bulk create slots for a date range."""
+        created_by: int,
+        on_chunk: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Bulk create slots for a date range, skipping ones that already exist. Returns how many were created.
+        Rows are streamed in SLOT_BULK_CHUNK_SIZE chunks, so memory does not grow with the range.
+        """
         service = db.query(Service).filter(Service.id == service_id).first()
         if not service:
             raise HTTPException(
@@ -126,26 +293,95 @@ class SlotService:
                 detail="Service not found"
             )
         
-        slots = []
-        current_date = start_date
+        slot_cache.stage_invalidate(db, service_id)
+        rows = SlotService.iter_slot_rows(service_id, start_date, end_date, time_slots, capacity, created_by)
+        return bulk_insert_ignore(db, Slot, rows, settings.SLOT_BULK_CHUNK_SIZE, on_chunk)
+    
+    @staticmethod
+    def create_template(db: Session, template_data: SlotTemplateCreate) -> SlotTemplate:
+        """Add a recurring slot to a service's schedule."""
+        service = db.query(Service).filter(Service.id == template_data.service_id).first()
+        if not service:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Service not found"
+            )
         
-        while current_date <= end_date:
-            for start_time, end_time in time_slots:
-                slot = Slot(
-                    service_id=service_id,
-                    date=current_date,
-                    start_time=start_time,
-                    end_time=end_time,
-                    capacity=capacity,
-                    created_by=created_by
+        template = SlotTemplate(**template_data.model_dump())
+        db.add(template)
+        try:
+            db.flush()
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A template already exists for this service, weekday and start time"
+            )
+        db.refresh(template)
+        
+        slot_cache.stage_invalidate(db, template.service_id)
+        return template
+    
+    @staticmethod
+    def get_templates(db: Session, service_id: int = None) -> list[SlotTemplate]:
+        """Get active slot templates, optionally for one service."""
+        query = db.query(SlotTemplate).filter(SlotTemplate.is_active == True)
+        if service_id:
+            query = query.filter(SlotTemplate.service_id == service_id)
+        return query.order_by(SlotTemplate.service_id, SlotTemplate.weekday, SlotTemplate.start_time).all()
+    
+    @staticmethod
+    def delete_template(db: Session, template_id: int) -> None:
+        """Soft delete a slot template. Slots that were already booked are kept."""
+        template = db.query(SlotTemplate).filter(SlotTemplate.id == template_id).first()
+        if not template:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Slot template not found"
+            )
+        template.is_active = False
+        db.flush()
+        
+        slot_cache.stage_invalidate(db, template.service_id)
+    
+    @staticmethod
+    def create_exception(db: Session, exception_data: ScheduleExceptionCreate) -> ScheduleException:
+        """Close or resize scheduled slots on one date, for one service or all of them."""
+        if exception_data.service_id:
+            service = db.query(Service).filter(Service.id == exception_data.service_id).first()
+            if not service:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Service not found"
                 )
-                slots.append(slot)
-            
-            # Move to next day
-            from datetime import timedelta
-            current_date += timedelta(days=1)
         
-        db.add_all(slots)
-        db.commit()
+        exception = ScheduleException(**exception_data.model_dump())
+        db.add(exception)
+        db.flush()
+        db.refresh(exception)
+        
+        slot_cache.stage_invalidate(db, exception.service_id)
+        return exception
+    
+    @staticmethod
+    def get_exceptions(db: Session, service_id: int = None, from_date: date = None) -> list[ScheduleException]:
+        """Get schedule exceptions, optionally for one service (global ones included)."""
+        query = db.query(ScheduleException)
+        if service_id:
+            query = query.filter(or_(ScheduleException.service_id == service_id, ScheduleException.service_id == None))
+        if from_date:
+            query = query.filter(ScheduleException.date >= from_date)
+        return query.order_by(ScheduleException.date, ScheduleException.start_time).all()
+    
+    @staticmethod
+    def delete_exception(db: Session, exception_id: int) -> None:
+        """Delete a schedule exception, restoring the regular schedule for its date."""
+        exception = db.query(ScheduleException).filter(ScheduleException.id == exception_id).first()
+        if not exception:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Schedule exception not found"
+            )
+        db.delete(exception)
+        db.flush()
         
-        return slots
+        slot_cache.stage_invalidate(db, exception.service_id)
@@ -23,4 +23,5 @@ class UserResponse(UserBase):
 
 class UserListResponse(BaseModel):
     users: list[UserResponse]
-    total: int
+    total: int  # Planner estimate, not an exact count
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
@@ -2,10 +2,15 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from db.models import User
 from app.users.schemas import UserUpdate
+from core.pagination import keyset_page, estimate_count, encode_cursor, sort_key
+from typing import Optional, Tuple
 
 class UserService:
     """Service for user management operations."""
     
+    # Sort key of the user listing, backed by ix_users_created_id
+    USER_ORDER = (User.created_at, User.id)
+    
     @staticmethod
     def get_user_by_id(db: Session, user_id: int) -> User:
         """Get user by ID."""
@@ -18,15 +23,41 @@ class UserService:
         return user
     
     @staticmethod
-    def get_users(db: Session, skip: int = 0, limit: int = 100, role: str = None) -> list[User]:
-        """Get list of users with optional role filter."""
-        query = db.query(User)
+    def get_users(
+        db: Session,
+        cursor: str = None,
+        limit: int = 100,
+        role: str = None,
+        skip: int = 0
+    ) -> Tuple[list[User], Optional[str], int]:
+        """
+        Get a page of users in signup order, with optional role filter. Returns (users, next_cursor, estimated_total).
+        skip is the deprecated offset paging; its pages also carry a cursor so clients can switch over.
+        """
+        query = UserService.users_query(db, role)
+        if not skip:
+            users, next_cursor = keyset_page(query, UserService.USER_ORDER, cursor, limit)
+            return users, next_cursor, estimate_count(db, query)
         
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or skip, not both"
+            )
+        users = query.order_by(*UserService.USER_ORDER).offset(skip).limit(limit + 1).all()
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(sort_key(users[-1], UserService.USER_ORDER))
+        return users, next_cursor, estimate_count(db, query)
+    
+    @staticmethod
+    def users_query(db: Session, role: str = None):
+        """Users, optionally of one role, before paging."""
+        query = db.query(User)
         if role:
             query = query.filter(User.role == role)
-        
-        users = query.offset(skip).limit(limit).all()
-        return users
+        return query
     
     @staticmethod
     def update_user(db: Session, user_id: int, user_data: UserUpdate) -> User:
@@ -37,7 +68,7 @@ class UserService:
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        db.commit()
+        db.flush()
         db.refresh(user)
         return user
     
@@ -46,12 +77,4 @@ class UserService:
         """Soft delete user by setting status to DELETED."""
         user = UserService.get_user_by_id(db, user_id)
         user.status = "DELETED"
-        db.commit()
-    
-    @staticmethod
-    def get_user_count(db: Session, role: str = None) -> int:
-        """Get total count of users."""
-        query = db.query(User)
-        if role:
-            query = query.filter(User.role == role)
-        return query.count()
+        db.flush()
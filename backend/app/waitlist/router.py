@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, status
+from db.database import DbSession, get_session, run_db, run_unit_of_work
+from app.waitlist.schemas import WaitlistJoin, WaitlistEntryResponse
+from app.waitlist.service import WaitlistService
+from app.auth.dependencies import get_current_user
+from db.models import User
+
+router = APIRouter()
+
+@router.post("/join", response_model=WaitlistEntryResponse, status_code=status.HTTP_201_CREATED)
+async def join_waitlist(
+    join_data: WaitlistJoin,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Join the waitlist of a full slot. Promotion is pushed over the user's websocket."""
+    return await run_unit_of_work(db, WaitlistService.join_waitlist, current_user.id, join_data)
+
+@router.get("/my-entries", response_model=list[WaitlistEntryResponse])
+async def get_my_entries(
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Get all waitlist entries for current user."""
+    return await run_db(db, WaitlistService.get_user_entries, current_user.id)
+
+@router.get("/{entry_id}", response_model=WaitlistEntryResponse)
+async def get_entry(
+    entry_id: int,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Get a waitlist entry with its current position."""
+    return await run_db(db, WaitlistService.get_entry_status, entry_id, current_user.id)
+
+@router.put("/{entry_id}/leave", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waitlist(
+    entry_id: int,
+    current_user: User = Depends(get_current_user),
+    db: DbSession = Depends(get_session)
+):
+    """Leave a slot's waitlist."""
+    await run_unit_of_work(db, WaitlistService.leave_waitlist, entry_id, current_user.id)
+    return None
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class WaitlistJoin(BaseModel):
+    slot_id: int
+
+class WaitlistEntryResponse(BaseModel):
+    id: int
+    user_id: int
+    slot_id: int
+    service_id: int
+    status: str
+    position: Optional[int] = None
+    appointment_id: Optional[int] = None
+    created_at: datetime
+    promoted_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,209 @@
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from db.database import on_commit
+from db.models import Appointment, Slot, User, WaitlistEntry
+from app.waitlist.schemas import WaitlistJoin, WaitlistEntryResponse
+from app.slots.service import SlotService
+from app.slots.schedule import slot_schedule
+from app.appointments.service import AppointmentService
+from app.queue.engine import queue_engine, waitlist_engine
+from app.queue.estimator import wait_estimator
+from app.events.bus import event_bus
+from datetime import datetime
+from typing import Optional, Tuple
+
+class WaitlistService:
+    """Service for per-slot waitlists and promotion into freed seats."""
+    
+    @staticmethod
+    def to_response(entry: WaitlistEntry, position: int = None) -> WaitlistEntryResponse:
+        """Build the API response for an entry with its current position."""
+        return WaitlistEntryResponse.model_validate(entry).model_copy(update={"position": position})
+    
+    @staticmethod
+    def join_waitlist(db: Session, user_id: int, join_data: WaitlistJoin) -> WaitlistEntryResponse:
+        """Join the waitlist of a full slot."""
+        slot = slot_schedule.get_slot(db, join_data.slot_id)
+        if not slot:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Slot not found"
+            )
+        
+        if slot.booked_count < slot.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Slot has availability, book it directly"
+            )
+        
+        booked = db.query(Appointment.id).filter(
+            Appointment.slot_id == slot.id,
+            Appointment.user_id == user_id,
+            Appointment.status == "CONFIRMED"
+        ).first()
+        if booked:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You already have an appointment in this slot"
+            )
+        
+        waiting = db.query(WaitlistEntry.id).filter(
+            WaitlistEntry.slot_id == slot.id,
+            WaitlistEntry.user_id == user_id,
+            WaitlistEntry.status == "WAITING"
+        ).first()
+        if waiting:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already on the waitlist for this slot"
+            )
+        
+        user = db.query(User).filter(User.id == user_id).first()
+        position = waitlist_engine.get_queue(db, slot.id).position_for(user.priority_weight)
+        
+        entry = WaitlistEntry(
+            user_id=user_id,
+            slot_id=slot.id,
+            service_id=slot.service_id,
+            priority_weight=user.priority_weight,
+            status="WAITING"
+        )
+        db.add(entry)
+        db.flush()
+        db.refresh(entry)
+        
+        on_commit(db, lambda: waitlist_engine.add(slot.id, entry.id, entry.priority_weight, user_id))
+        
+        return WaitlistService.to_response(entry, position)
+    
+    @staticmethod
+    def get_entry_by_id(db: Session, entry_id: int) -> WaitlistEntry:
+        """Get waitlist entry by ID."""
+        entry = db.query(WaitlistEntry).filter(WaitlistEntry.id == entry_id).first()
+        if not entry:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Waitlist entry not found"
+            )
+        return entry
+    
+    @staticmethod
+    def get_entry_status(db: Session, entry_id: int, user_id: int) -> WaitlistEntryResponse:
+        """Get a user's waitlist entry with its live position."""
+        entry = WaitlistService.get_entry_by_id(db, entry_id)
+        if entry.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view this waitlist entry"
+            )
+        
+        position = None
+        if entry.status == "WAITING":
+            position = waitlist_engine.get_queue(db, entry.slot_id).position(entry.id)
+        return WaitlistService.to_response(entry, position)
+    
+    @staticmethod
+    def get_user_entries(db: Session, user_id: int) -> list[WaitlistEntryResponse]:
+        """Get all waitlist entries for a user."""
+        entries = db.query(WaitlistEntry).filter(
+            WaitlistEntry.user_id == user_id
+        ).order_by(WaitlistEntry.created_at.desc()).all()
+        
+        return [
+            WaitlistService.to_response(
+                entry,
+                waitlist_engine.get_queue(db, entry.slot_id).position(entry.id) if entry.status == "WAITING" else None
+            )
+            for entry in entries
+        ]
+    
+    @staticmethod
+    def leave_waitlist(db: Session, entry_id: int, user_id: int) -> None:
+        """Leave a slot's waitlist."""
+        entry = WaitlistService.get_entry_by_id(db, entry_id)
+        
+        if entry.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to leave this waitlist entry"
+            )
+        
+        if entry.status != "WAITING":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Waitlist entry is no longer waiting"
+            )
+        
+        entry.status = "LEFT"
+        WaitlistService.stage_shifted_positions(db, entry)
+        db.flush()
+        
+        on_commit(db, lambda: waitlist_engine.remove(entry.slot_id, entry.id))
+    
+    @staticmethod
+    def stage_shifted_positions(db: Session, entry: WaitlistEntry) -> None:
+        """Notify the users behind an entry that is leaving the waitlist."""
+        slot_queue = waitlist_engine.get_queue(db, entry.slot_id)
+        vacated_position = slot_queue.position(entry.id)
+        if vacated_position:
+            for entry_id, entry_user_id, position in slot_queue.entries_from(vacated_position + 1):
+                event_bus.stage_waitlist_update(db, entry_user_id, entry_id, "WAITING", position - 1)
+    
+    @staticmethod
+    def head_query(db: Session, slot_id: int):
+        """A slot's waiting entries in promotion order."""
+        return db.query(WaitlistEntry).filter(
+            WaitlistEntry.slot_id == slot_id,
+            WaitlistEntry.status == "WAITING"
+        ).order_by(
+            WaitlistEntry.priority_weight.desc(),
+            WaitlistEntry.id
+        )
+    
+    @staticmethod
+    def promote_next(db: Session, slot: Slot, vacating_appointment_id: int = None) -> Optional[Tuple[Appointment, int]]:
+        """
+        Move the head of a slot's waitlist into a freed seat.
+        Runs inside the caller's transaction, so the promotion commits with the
+        change that freed the seat. Returns the new appointment and its queue position.
+        """
+        # The database decides the head, so waitlists stay correct across workers
+        entry = WaitlistService.head_query(db, slot.id).with_for_update().first()
+        if not entry:
+            return None
+        
+        # The appointment being cancelled is still in the in-memory queue until commit
+        slot_queue = queue_engine.get_queue(db, slot.id)
+        queue_position = slot_queue.position_for(entry.priority_weight)
+        vacated_position = slot_queue.position(vacating_appointment_id) if vacating_appointment_id else None
+        if vacated_position and vacated_position < queue_position:
+            queue_position -= 1
+        
+        appointment = Appointment(
+            user_id=entry.user_id,
+            slot_id=slot.id,
+            service_id=entry.service_id,
+            booking_reference=AppointmentService.generate_booking_reference(),
+            priority_weight=entry.priority_weight,
+            estimated_wait_minutes=wait_estimator.estimate(db, entry.service_id, queue_position),
+            status="CONFIRMED"
+        )
+        db.add(appointment)
+        slot.booked_count += 1
+        SlotService.update_slot_status(db, slot)
+        
+        WaitlistService.stage_shifted_positions(db, entry)
+        entry.status = "PROMOTED"
+        entry.promoted_at = datetime.utcnow()
+        db.flush()
+        entry.appointment_id = appointment.id
+        
+        event_bus.stage_appointment_update(db, entry.user_id, appointment.id, "CONFIRMED", queue_position)
+        event_bus.stage_waitlist_update(db, entry.user_id, entry.id, "PROMOTED", None, appointment.id)
+        
+        def apply():
+            queue_engine.add(slot.id, appointment.id, entry.priority_weight, entry.user_id)
+            waitlist_engine.remove(slot.id, entry.id)
+        on_commit(db, apply)
+        
+        return appointment, queue_position
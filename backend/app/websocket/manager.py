@@ -80,6 +80,15 @@ class ConnectionManager:
         }
         await self.broadcast(message, "slots")
     
+    async def broadcast_now_serving(self, counter_id: int, serving_data: dict):
+        """Broadcast which appointment a counter is serving."""
+        message = {
+            "type": "now_serving",
+            "counter_id": counter_id,
+            "data": serving_data
+        }
+        await self.broadcast(message, "queue")
+    
     async def broadcast_admin_update(self, metric_type: str, data: dict):
         """Broadcast admin dashboard update."""
         message = {
@@ -104,6 +113,24 @@ class ConnectionManager:
             "queue_position": queue_position
         }
         await self.send_personal_message(message, user_id)
+    
+    async def notify_waitlist_update(
+        self,
+        user_id: int,
+        entry_id: int,
+        status: str,
+        position: int = None,
+        appointment_id: int = None
+    ):
+        """Notify user about their waitlist entry, including promotion to an appointment."""
+        message = {
+            "type": "waitlist_update",
+            "entry_id": entry_id,
+            "status": status,
+            "position": position,
+            "appointment_id": appointment_id
+        }
+        await self.send_personal_message(message, user_id)
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -0,0 +1,154 @@
+"""
+Concurrency benchmark for the booking path.
+
+Fires N bookings at a single slot from as many worker threads as the
+connection pool holds, and verifies that the slot is never overbooked and
+that each booking costs exactly one commit. Runs against the database
+configured in DATABASE_URL and removes everything it creates.
+
+The in-memory queue engine and wait estimator expect the single-threaded
+event loop, so each booking's post-commit hooks run under one lock.
+
+Usage:
+    python benchmark_booking.py --requests 500 --capacity 50 --mode conditional
+"""
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from db.database import MAX_OVERFLOW, POOL_SIZE, SessionLocal, commit_count, run_unit_of_work
+from db.migrations import upgrade_database
+from db.models import Service, User, Slot, Appointment
+from app.appointments.schemas import AppointmentCreate
+from app.appointments.service import AppointmentService
+from core.config import settings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
+import argparse
+import asyncio
+import logging
+import threading
+
+# Serializes the post-commit hooks that update the in-memory singletons
+hooks_lock = threading.Lock()
+
+def setup_fixture(db: Session, capacity: int):
+    """Create a throwaway service, user and slot"""
+    service = Service(name="Benchmark Service", avg_duration_minutes=10, is_active=True)
+    user = User(
+        email=f"benchmark-{datetime.now().timestamp()}@smartqueue.com",
+        password_hash="!",
+        name="Benchmark User",
+        role="USER",
+        priority_weight=1,
+        status="ACTIVE"
+    )
+    db.add_all([service, user])
+    db.commit()
+
+    slot = Slot(
+        service_id=service.id,
+        date=datetime.now().date(),
+        start_time=time(9, 0),
+        end_time=time(9, 30),
+        capacity=capacity,
+        booked_count=0,
+        status="AVAILABLE"
+    )
+    db.add(slot)
+    db.commit()
+    return service.id, user.id, slot.id
+
+def teardown_fixture(db: Session, service_id: int, user_id: int, slot_id: int):
+    """Remove everything created by the benchmark"""
+    db.query(Appointment).filter(Appointment.slot_id == slot_id).delete()
+    db.query(Slot).filter(Slot.id == slot_id).delete()
+    db.query(Service).filter(Service.id == service_id).delete()
+    db.query(User).filter(User.id == user_id).delete()
+    db.commit()
+
+def book_once(user_id: int, slot_id: int, service_id: int) -> str:
+    """Book one appointment in its own session and event loop"""
+    hooks = []
+
+    def book(session: Session):
+        appointment = AppointmentService.book_appointment(
+            session, user_id, AppointmentCreate(slot_id=slot_id, service_id=service_id)
+        )
+        # Run after the commit, under the lock, instead of inside it on this thread
+        hooks.extend(session.info.pop("on_commit", []))
+        return appointment
+
+    async def run():
+        db = SessionLocal()
+        try:
+            await run_unit_of_work(db, book)
+            commits = commit_count(db)
+            with hooks_lock:
+                for hook in hooks:
+                    hook()
+            return "booked" if commits == 1 else f"error: {commits} commits for one booking"
+        except HTTPException as e:
+            return "full" if e.detail == "Slot is full" else f"error: {e.detail}"
+        finally:
+            db.close()
+    return asyncio.run(run())
+
+def main():
+    """Run the benchmark and verify capacity invariants"""
+    parser = argparse.ArgumentParser(description="Concurrent booking benchmark")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--mode", choices=["locking", "conditional"], default="conditional")
+    parser.add_argument("--workers", type=int, default=POOL_SIZE + MAX_OVERFLOW,
+                        help="Concurrent bookings, at most the connection pool size")
+    args = parser.parse_args()
+    workers = max(1, min(args.workers, args.requests, POOL_SIZE + MAX_OVERFLOW))
+
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    settings.BOOKING_MODE = args.mode
+    upgrade_database()
+
+    db = SessionLocal()
+    service_id, user_id, slot_id = setup_fixture(db, args.capacity)
+
+    try:
+        started = datetime.now()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda _: book_once(user_id, slot_id, service_id),
+                range(args.requests)
+            ))
+        elapsed = (datetime.now() - started).total_seconds()
+
+        db.expire_all()
+        slot = db.query(Slot).filter(Slot.id == slot_id).first()
+        confirmed = db.query(Appointment).filter(
+            Appointment.slot_id == slot_id,
+            Appointment.status == "CONFIRMED"
+        ).count()
+        booked = results.count("booked")
+        rejected = results.count("full")
+        errors = [r for r in results if r.startswith("error")]
+
+        print(f"Mode:       {args.mode} ({workers} workers)")
+        print(f"Requests:   {args.requests} in {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)")
+        print(f"Booked:     {booked}  Rejected (full): {rejected}  Errors: {len(errors)}")
+        print(f"Slot:       booked_count={slot.booked_count} capacity={slot.capacity} status={slot.status}")
+        print(f"Appointments confirmed: {confirmed}")
+
+        expected = min(args.capacity, args.requests)
+        if errors:
+            print(f"\n[FAIL] {len(errors)} booking requests failed, e.g. {errors[0]}")
+            raise SystemExit(1)
+        if slot.booked_count != confirmed or confirmed != booked or confirmed > slot.capacity:
+            print("\n[FAIL] Slot was overbooked or counts diverged")
+            raise SystemExit(1)
+        if booked != expected:
+            print(f"\n[FAIL] Expected {expected} bookings, got {booked}")
+            raise SystemExit(1)
+        print("\n[OK] No overbooking")
+    finally:
+        teardown_fixture(db, service_id, user_id, slot_id)
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from db.database import on_commit
+from db.models import IdempotencyRecord
+from core.config import settings
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+import json
+import time
+
+class IdempotencyStore:
+    """Stores completed responses keyed by (user_id, Idempotency-Key).
+
+    Recent responses live in a bounded LRU map with a TTL; the
+    idempotency_records table is the fallback when the memory entry was
+    evicted or the request lands on another worker.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (user_id, key) -> (expires_at, fingerprint, status_code, body)
+        self.entries: "OrderedDict[Tuple[int, str], Tuple[float, str, int, Optional[str]]]" = OrderedDict()
+        self.in_flight: set = set()
+
+    def _remember(self, user_id: int, key: str, fingerprint: str, status_code: int, body: Optional[str], expires_at: float) -> None:
+        self.entries[(user_id, key)] = (expires_at, fingerprint, status_code, body)
+        self.entries.move_to_end((user_id, key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def _response(status_code: int, body: Optional[str]) -> Response:
+        if body is None:
+            return Response(status_code=status_code)
+        return JSONResponse(status_code=status_code, content=json.loads(body))
+
+    def replay(self, db: Session, user_id: int, key: str, fingerprint: str) -> Optional[Response]:
+        """Return the stored response for a key, or None if the request is new."""
+        if (user_id, key) in self.in_flight:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+
+        entry = self.entries.get((user_id, key))
+        if entry and entry[0] < time.time():
+            del self.entries[(user_id, key)]
+            entry = None
+
+        if entry is None:
+            record = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.user_id == user_id,
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.created_at >= datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+            ).first()
+            if record is None:
+                return None
+            age = datetime.utcnow() - record.created_at.replace(tzinfo=None)
+            expires_at = time.time() + self.ttl_seconds - age.total_seconds()
+            self._remember(user_id, key, record.fingerprint, record.status_code, record.response_body, expires_at)
+            entry = self.entries[(user_id, key)]
+        else:
+            self.entries.move_to_end((user_id, key))
+
+        _, stored_fingerprint, status_code, body = entry
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return self._response(status_code, body)
+
+    def begin(self, user_id: int, key: str) -> None:
+        """Mark a key as in progress until release() is called."""
+        self.in_flight.add((user_id, key))
+
+    def release(self, user_id: int, key: str) -> None:
+        """Clear the in-progress marker without storing a response."""
+        self.in_flight.discard((user_id, key))
+
+    def save(self, db: Session, user_id: int, key: str, fingerprint: str, status_code: int, content: Any = None) -> None:
+        """Stage a completed response in the same transaction as the change it describes."""
+        record = self.claim(db, user_id, key, fingerprint)
+        self.complete(db, record, status_code, content)
+
+    def claim(self, db: Session, user_id: int, key: str, fingerprint: str) -> IdempotencyRecord:
+        """
+        Insert a key's record before its response is known; fill it in with complete().
+        The insert runs in a savepoint, so a key another worker stored first only
+        rejects this request and the rest of the transaction can go on.
+        """
+        # A key reused after the TTL replaces its expired record instead of hitting the unique constraint
+        db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.created_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        ).delete(synchronize_session=False)
+        record = IdempotencyRecord(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            status_code=0
+        )
+        try:
+            with db.begin_nested():
+                db.add(record)
+        except IntegrityError:
+            # Another worker stored the same key first, so this change must not commit
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key was already completed"
+            )
+        return record
+
+    def complete(self, db: Session, record: IdempotencyRecord, status_code: int, content: Any = None) -> None:
+        """Store the response of a claimed key; it is replayed once the transaction commits."""
+        body = json.dumps(jsonable_encoder(content)) if content is not None else None
+        record.status_code = status_code
+        record.response_body = body
+        user_id, key, fingerprint = record.user_id, record.key, record.fingerprint
+        on_commit(db, lambda: self._remember(
+            user_id, key, fingerprint, status_code, body, time.time() + self.ttl_seconds
+        ))
+
+    def purge_expired(self, db: Session) -> int:
+        """Delete records older than the TTL from the fallback table."""
+        deleted = db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.created_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        ).delete(synchronize_session=False)
+        return deleted
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS
+)
@@ -0,0 +1,104 @@
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+from datetime import date, datetime, time
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+# Parses a cursor value back into the Python type of its sort column
+_PARSERS = {
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    datetime: datetime.fromisoformat,
+    int: int,
+    str: str,
+}
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple:
+    """Decode a cursor into typed sort key values for the given columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return tuple(
+            _PARSERS[column.type.python_type](value)
+            for column, value in zip(columns, values)
+        )
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def sort_key(row, columns: Sequence) -> Tuple:
+    """A row's values for the sort columns."""
+    return tuple(getattr(row, column.key) for column in columns)
+
+def keyset_page(
+    query: Query,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page ordered by columns (all ascending or all descending), starting
+    after the cursor, with a row-value comparison the index can seek to.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    # One extra row tells whether another page exists
+    rows = keyset_query(query, columns, cursor, limit, descending).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort_key(rows[-1], columns))
+
+def keyset_query(
+    query: Query,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+) -> Query:
+    """The query keyset_page runs for a page: one row past the limit, after the cursor."""
+    if cursor:
+        after = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+    query = query.order_by(*(column.desc() if descending else column for column in columns))
+    return query.limit(limit + 1)
+
+def set_page_headers(response, next_cursor: Optional[str], estimated_total: int) -> None:
+    """Expose a list endpoint's page position: X-Next-Cursor (absent on the last page) and X-Total-Estimate."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["X-Total-Estimate"] = str(estimated_total)
+
+def estimate_count(db: Session, query: Query) -> int:
+    """
+    Planner row estimate for a query, read from EXPLAIN instead of counting rows.
+    Cheap at any table size but approximate.
+    """
+    bind = db.get_bind()
+    compiled = query.statement.compile(dialect=bind.dialect)
+    # Bind in the driver's paramstyle: positional for asyncpg ($1) and psycopg2 (%s), named for pymysql
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    connection = db.connection()
+    if bind.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    row = connection.exec_driver_sql("EXPLAIN " + str(compiled), params).mappings().first()
+    if row is None or row["rows"] is None:
+        return 0
+    return int(row["rows"] * (row.get("filtered") or 100) / 100)
@@ -1,12 +1,21 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from core.config import settings
+from typing import Callable, Iterable, List, Optional, TypeVar, Union
+from itertools import islice
 
 # Determine database type
 is_mysql = settings.DATABASE_URL.startswith("mysql")
 is_postgres = settings.DATABASE_URL.startswith("postgresql")
 
+# Connections per engine: a steady pool plus overflow under bursts
+POOL_SIZE = 10
+MAX_OVERFLOW = 20
+
 # Create engine with appropriate settings
 if is_mysql or is_postgres:
     # MySQL or PostgreSQL configuration
@@ -14,15 +23,51 @@ if is_mysql or is_postgres:
         settings.DATABASE_URL,
         echo=settings.DEBUG,
         pool_pre_ping=True,  # Verify connections before using them
-        pool_size=10,
-        max_overflow=20,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
         pool_recycle=3600  # Recycle connections after 1 hour
     )
 else:
     raise ValueError(f"Unsupported database URL: {settings.DATABASE_URL}. Only MySQL and PostgreSQL are supported.")
 
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Services only flush; the unit of work commits once at the request boundary,
+# so loaded objects stay valid after that commit instead of being reloaded
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async drivers used when DB_MODE is "async"
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    """Swap the sync driver in a database URL for its async counterpart."""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_MODE == "async":
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        echo=settings.DEBUG,
+        pool_pre_ping=True,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_recycle=3600
+    )
+    # Objects stay loaded after commit so responses can be serialized
+    # outside the session's greenlet without lazy loads
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+DbSession = Union[Session, AsyncSession]
+T = TypeVar("T")
 
 # Base class for models
 Base = declarative_base()
@@ -34,3 +79,121 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_session():
+    """Dependency for the session type selected by DB_MODE."""
+    if settings.DB_MODE == "async":
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run service code against either session type.
+    With an AsyncSession the service runs through run_sync, so every round-trip
+    goes over the async driver and never blocks the event loop.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return fn(db, *args, **kwargs)
+
+
+async def run_unit_of_work(db: DbSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run service code that writes and commit its changes exactly once.
+    Service methods only add and flush; this is the single commit for the request.
+    Any error rolls the whole unit back.
+    """
+    try:
+        result = await run_db(db, fn, *args, **kwargs)
+        if isinstance(db, AsyncSession):
+            await db.commit()
+        else:
+            db.commit()
+    except Exception:
+        if isinstance(db, AsyncSession):
+            await db.rollback()
+        else:
+            db.rollback()
+        raise
+    return result
+
+async def run_in_session(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run service code as one unit of work in a fresh session of the type selected by DB_MODE."""
+    if settings.DB_MODE == "async":
+        async with AsyncSessionLocal() as db:
+            return await run_unit_of_work(db, fn, *args, **kwargs)
+    db = SessionLocal()
+    try:
+        return await run_unit_of_work(db, fn, *args, **kwargs)
+    finally:
+        db.close()
+
+def bulk_insert_ignore(
+    db: Session,
+    model,
+    rows: Iterable[dict],
+    chunk_size: int = 1000,
+    on_chunk: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Insert rows with multi-row INSERTs, skipping any that hit a unique constraint.
+    Rows may be a generator; only one chunk is held in memory at a time.
+    on_chunk(rows_in_chunk, rows_inserted) is called after each chunk.
+    Returns the number of rows actually inserted.
+    """
+    dialect = db.get_bind().dialect.name
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        if dialect == "mysql":
+            statement = insert(model).prefix_with("IGNORE")
+        else:
+            statement = postgresql_insert(model).on_conflict_do_nothing()
+        chunk_inserted = db.execute(statement.values(chunk)).rowcount
+        inserted += chunk_inserted
+        if on_chunk is not None:
+            on_chunk(len(chunk), chunk_inserted)
+    return inserted
+
+def on_commit(db: Session, callback: Callable[[], None]) -> None:
+    """Run a callback once the current transaction commits; dropped on rollback."""
+    db.info.setdefault("on_commit", []).append(callback)
+
+def on_rollback(db: Session, callback: Callable[[], None]) -> None:
+    """Run a callback if the current transaction rolls back; dropped on commit."""
+    db.info.setdefault("on_rollback", []).append(callback)
+
+def commit_count(db: DbSession) -> int:
+    """Number of commits issued by a session since it was opened."""
+    if isinstance(db, AsyncSession):
+        db = db.sync_session
+    return db.info.get("commit_count", 0)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    # Releasing a savepoint also fires after_commit; only the outer commit counts
+    if session.in_nested_transaction():
+        return
+    session.info["commit_count"] = session.info.get("commit_count", 0) + 1
+    session.info.pop("on_rollback", None)
+    callbacks: List[Callable[[], None]] = session.info.pop("on_commit", [])
+    for callback in callbacks:
+        callback()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        return
+    session.info.pop("on_commit", None)
+    callbacks: List[Callable[[], None]] = session.info.pop("on_rollback", [])
+    for callback in callbacks:
+        callback()
@@ -0,0 +1,46 @@
+"""
+Schema migrations through Alembic (backend/migrations)
+"""
+from alembic import command, op
+from alembic.config import Config
+from sqlalchemy import inspect
+from db.database import engine
+from pathlib import Path
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema the original Base.metadata.create_all built
+BASELINE_REVISION = "0001"
+
+# Revisions 0002-0007 replay schema changes made while create_all was still in
+# use. A legacy database may already have any of them, so they check first.
+
+def has_table(table: str) -> bool:
+    """Whether the migrating database has a table."""
+    return table in inspect(op.get_bind()).get_table_names()
+
+def has_column(table: str, column: str) -> bool:
+    """Whether a table in the migrating database has a column."""
+    return column in {c["name"] for c in inspect(op.get_bind()).get_columns(table)}
+
+def has_unique(table: str, name: str) -> bool:
+    """Whether a table has a unique constraint (or MySQL unique index) with this name."""
+    inspector = inspect(op.get_bind())
+    names = {c["name"] for c in inspector.get_unique_constraints(table)}
+    names |= {i["name"] for i in inspector.get_indexes(table) if i.get("unique")}
+    return name in names
+
+def upgrade_database() -> None:
+    """
+    Bring the database schema up to the latest migration.
+    Databases created by create_all before migrations existed are stamped
+    at the baseline first, so only the later migrations run on them.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if "alembic_version" not in tables and "users" in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Time, Float, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Time, Float, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import select, case, and_, or_
+from sqlalchemy.orm import relationship, column_property, aliased
 from sqlalchemy.sql import func
 from db.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    # User listing pages in signup order
+    __table_args__ = (Index("ix_users_created_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     email = Column(String, unique=True, nullable=False, index=True)
@@ -31,19 +34,23 @@ class Service(Base):
     description = Column(Text)
     avg_duration_minutes = Column(Integer, default=15)
     is_active = Column(Boolean, default=True)
+    predictor = Column(String(32), nullable=False, default="wma", server_default="wma")  # wma, ewma, holt, holt_winters
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     slots = relationship("Slot", back_populates="service")
     appointments = relationship("Appointment", back_populates="service")
     counters = relationship("Counter", back_populates="service")
+    slot_templates = relationship("SlotTemplate", back_populates="service")
 
 
 class Slot(Base):
     __tablename__ = "slots"
+    # Also the index for day listings by (service_id, date) ordered by start_time
+    __table_args__ = (UniqueConstraint("service_id", "date", "start_time", name="uq_slot_service_date_start"),)
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
     date = Column(Date, nullable=False, index=True)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
@@ -58,18 +65,58 @@ class Slot(Base):
     appointments = relationship("Appointment", back_populates="slot")
     load_history = relationship("LoadHistory", back_populates="slot")
     predictions = relationship("Prediction", back_populates="slot")
+    
+    # True only for unsaved slots expanded from a service's schedule
+    is_virtual = False
+
+
+class SlotTemplate(Base):
+    __tablename__ = "slot_templates"
+    __table_args__ = (UniqueConstraint("service_id", "weekday", "start_time", name="uq_slot_template_service_weekday_start"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
+    weekday = Column(Integer)  # 0 = Monday ... 6 = Sunday, NULL = every day
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    capacity = Column(Integer, nullable=False, default=10)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    service = relationship("Service", back_populates="slot_templates")
+
+
+class ScheduleException(Base):
+    __tablename__ = "schedule_exceptions"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    service_id = Column(Integer, ForeignKey("services.id"), index=True)  # NULL = every service, e.g. a public holiday
+    date = Column(Date, nullable=False, index=True)
+    start_time = Column(Time)  # NULL = the whole day
+    is_closed = Column(Boolean, default=True)
+    capacity = Column(Integer)  # Capacity override when not closed
+    reason = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Queue reads: a slot's CONFIRMED entries in (priority_weight, id) order
+        Index("ix_appointments_slot_status_priority", "slot_id", "status", "priority_weight", "id"),
+        # My bookings, newest first
+        Index("ix_appointments_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
     booking_reference = Column(String, unique=True, nullable=False, index=True)
-    status = Column(String, default="CONFIRMED", index=True)  # CONFIRMED, CANCELLED, COMPLETED, NO_SHOW
-    queue_position = Column(Integer)
+    guest_name = Column(String)  # Set when booked on behalf of a guest
+    status = Column(String, default="CONFIRMED", index=True)  # CONFIRMED, SERVING, CANCELLED, COMPLETED, NO_SHOW
+    priority_weight = Column(Integer, default=1, server_default="1")  # Booker's weight, part of the queue ordering key
     estimated_wait_minutes = Column(Integer)
     checked_in_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
@@ -98,6 +145,8 @@ class Counter(Base):
 
 class LoadHistory(Base):
     __tablename__ = "load_history"
+    # Rollup and retention scan one resolution by age
+    __table_args__ = (Index("ix_load_history_resolution_timestamp", "resolution", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False, index=True)
@@ -105,16 +154,44 @@ class LoadHistory(Base):
     booked_count = Column(Integer, nullable=False)
     capacity = Column(Integer, nullable=False)
     load_percentage = Column(Float)
+    resolution = Column(String(10), nullable=False, default="RAW", server_default="RAW")  # RAW, HOURLY, DAILY
     
     # Relationships
     slot = relationship("Slot", back_populates="load_history")
 
 
+class LoadAggregate(Base):
+    __tablename__ = "load_aggregates"
+    
+    # Rolling WMA state for one time of day of a service, see app.prediction.aggregates
+    service_id = Column(Integer, ForeignKey("services.id"), primary_key=True)
+    weekday = Column(Integer, primary_key=True)  # 0 = Monday
+    start_time = Column(Time, primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    load_sum = Column(Float, nullable=False, default=0.0)
+    weighted_sum = Column(Float, nullable=False, default=0.0)  # Newest day weighted sample_count, oldest 1
+    window = Column(Text, nullable=False, default="[]")  # JSON list of daily loads, oldest first
+    last_date = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ForecastState(Base):
+    __tablename__ = "forecast_states"
+    
+    # Streaming predictor models for one time of day of a service, see app.prediction.predictors
+    service_id = Column(Integer, ForeignKey("services.id"), primary_key=True)
+    start_time = Column(Time, primary_key=True)
+    state = Column(Text, nullable=False, default="{}")  # JSON: predictor name -> model floats
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class Prediction(Base):
     __tablename__ = "predictions"
+    # Latest prediction for a slot
+    __table_args__ = (Index("ix_predictions_slot_created", "slot_id", "created_at"),)
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False, index=True)
+    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False)
     predicted_wait_minutes = Column(Integer)
     congestion_score = Column(Float)  # 0.0 to 1.0
     confidence_score = Column(Float)  # 0.0 to 1.0
@@ -154,3 +231,55 @@ class AuditLog(Base):
     
     # Relationships
     user = relationship("User", back_populates="audit_logs")
+
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_records"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String, nullable=False)  # Identifies the original request
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text)  # JSON, NULL for empty responses
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class WaitlistEntry(Base):
+    __tablename__ = "waitlist_entries"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    slot_id = Column(Integer, ForeignKey("slots.id"), nullable=False, index=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    priority_weight = Column(Integer, default=1, server_default="1")  # Copied from the user at join time
+    status = Column(String, default="WAITING", index=True)  # WAITING, PROMOTED, LEFT
+    appointment_id = Column(Integer, ForeignKey("appointments.id"))  # Set on promotion
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    promoted_at = Column(DateTime(timezone=True))
+
+
+# Queue position is derived at read time as a rank over the immutable
+# (priority_weight DESC, id ASC) key, so queue changes never rewrite other rows.
+_queued = aliased(Appointment)
+Appointment.queue_position = column_property(
+    case(
+        (
+            Appointment.status == "CONFIRMED",
+            select(func.count(_queued.id)).where(
+                _queued.slot_id == Appointment.slot_id,
+                _queued.status == "CONFIRMED",
+                or_(
+                    _queued.priority_weight > Appointment.priority_weight,
+                    and_(
+                        _queued.priority_weight == Appointment.priority_weight,
+                        _queued.id <= Appointment.id
+                    )
+                )
+            ).correlate_except(_queued).scalar_subquery()
+        ),
+        else_=None
+    )
+)
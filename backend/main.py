@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
-from db.database import engine, Base
+from db.database import SessionLocal
+from db.migrations import upgrade_database
+from db.models import ForecastState, LoadAggregate
 from app.auth.router import router as auth_router
 from app.users.router import router as users_router
 from app.services.router import router as services_router
@@ -12,9 +14,21 @@ from app.admin.router import router as admin_router
 from app.recommendations.router import router as recommendations_router
 from app.analytics.router import router as analytics_router
 from app.websocket.router import router as websocket_router
+from app.waitlist.router import router as waitlist_router
+from app.counters.router import router as counters_router
+from app.queue.engine import queue_engine, waitlist_engine
+from app.counters.engine import dispatch_engine
+from app.queue.estimator import wait_estimator
+from app.slots.bulk import slot_bulk_creator
+from app.prediction.cache import prediction_cache
+from app.prediction.sampler import load_sampler
+from app.prediction.aggregates import LoadAggregateService
+from app.prediction.predictors import ForecastStateService
+from core.idempotency import idempotency_store
+from app.events.bus import event_bus
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+# Create or upgrade tables through the Alembic migrations
+upgrade_database()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -30,8 +44,84 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Listing-Version", "X-Listing-Full", "X-Next-Cursor", "X-Total-Estimate"],
 )
 
+@app.on_event("startup")
+async def rebuild_queue_engine():
+    """Load queue, waitlist and counter dispatch ordering for active slots into memory."""
+    db = SessionLocal()
+    try:
+        queue_engine.rebuild(db)
+        waitlist_engine.rebuild(db)
+        dispatch_engine.rebuild(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_event_bus():
+    """Start the post-commit notification dispatcher."""
+    event_bus.start()
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    """Flush pending notifications and stop the dispatcher."""
+    await event_bus.stop()
+
+@app.on_event("startup")
+async def start_wait_estimator():
+    """Start recomputing estimated waits after queue changes."""
+    wait_estimator.start()
+
+@app.on_event("shutdown")
+async def stop_wait_estimator():
+    """Stop the estimated wait recomputation stage."""
+    await wait_estimator.stop()
+
+@app.on_event("shutdown")
+async def stop_slot_bulk_creator():
+    """Cancel background bulk slot creations."""
+    await slot_bulk_creator.stop()
+
+@app.on_event("startup")
+async def start_prediction_snapshots():
+    """Start writing cached predictions to the predictions table in batches."""
+    prediction_cache.start()
+
+@app.on_event("shutdown")
+async def stop_prediction_snapshots():
+    """Write the last prediction snapshot and stop."""
+    await prediction_cache.stop()
+
+@app.on_event("startup")
+async def start_load_sampler():
+    """Fill empty load aggregates and predictor states from load history, then start sampling."""
+    db = SessionLocal()
+    try:
+        if db.query(LoadAggregate).first() is None:
+            LoadAggregateService.rebuild(db)
+        if db.query(ForecastState).first() is None:
+            ForecastStateService.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    load_sampler.start()
+
+@app.on_event("shutdown")
+async def stop_load_sampler():
+    """Stop load history sampling."""
+    await load_sampler.stop()
+
+@app.on_event("startup")
+async def purge_idempotency_records():
+    """Drop stored responses older than the idempotency TTL."""
+    db = SessionLocal()
+    try:
+        idempotency_store.purge_expired(db)
+        db.commit()
+    finally:
+        db.close()
+
 @app.get("/")
 async def root():
     return {
@@ -54,5 +144,7 @@ app.include_router(prediction_router, prefix="/api/predictions", tags=["Predicti
 app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 app.include_router(recommendations_router, prefix="/api/recommendations", tags=["Recommendations"])
 app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(waitlist_router, prefix="/api/waitlist", tags=["Waitlist"])
+app.include_router(counters_router, prefix="/api/counters", tags=["Counters"])
 app.include_router(websocket_router, prefix="/ws", tags=["WebSocket"])
 
@@ -0,0 +1,168 @@
+"""Baseline schema, as the original create_all built it
+
+Databases created by create_all before migrations existed are stamped at
+this revision by db.migrations.upgrade_database; revisions 0002-0007 then
+add whatever later create_all runs and manual upgrades did not.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _id() -> sa.Column:
+    return sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True)
+
+
+def _created_at() -> sa.Column:
+    return sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        _id(),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String()),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("priority_weight", sa.Integer()),
+        sa.Column("status", sa.String()),
+        _created_at(),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_role", "users", ["role"])
+
+    op.create_table(
+        "services",
+        _id(),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("avg_duration_minutes", sa.Integer()),
+        sa.Column("is_active", sa.Boolean()),
+        _created_at(),
+    )
+    op.create_index("ix_services_id", "services", ["id"])
+
+    op.create_table(
+        "slots",
+        _id(),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        sa.Column("capacity", sa.Integer(), nullable=False),
+        sa.Column("booked_count", sa.Integer()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        _created_at(),
+    )
+    op.create_index("ix_slots_id", "slots", ["id"])
+    op.create_index("ix_slots_service_id", "slots", ["service_id"])
+    op.create_index("ix_slots_date", "slots", ["date"])
+    op.create_index("ix_slots_status", "slots", ["status"])
+
+    op.create_table(
+        "appointments",
+        _id(),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("slot_id", sa.Integer(), sa.ForeignKey("slots.id"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("booking_reference", sa.String(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("queue_position", sa.Integer()),
+        sa.Column("estimated_wait_minutes", sa.Integer()),
+        sa.Column("checked_in_at", sa.DateTime(timezone=True)),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        sa.Column("cancelled_at", sa.DateTime(timezone=True)),
+        _created_at(),
+    )
+    op.create_index("ix_appointments_id", "appointments", ["id"])
+    op.create_index("ix_appointments_user_id", "appointments", ["user_id"])
+    op.create_index("ix_appointments_slot_id", "appointments", ["slot_id"])
+    op.create_index("ix_appointments_booking_reference", "appointments", ["booking_reference"], unique=True)
+    op.create_index("ix_appointments_status", "appointments", ["status"])
+
+    op.create_table(
+        "counters",
+        _id(),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("current_serving_appointment_id", sa.Integer(), sa.ForeignKey("appointments.id")),
+        _created_at(),
+    )
+    op.create_index("ix_counters_id", "counters", ["id"])
+
+    op.create_table(
+        "load_history",
+        _id(),
+        sa.Column("slot_id", sa.Integer(), sa.ForeignKey("slots.id"), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("booked_count", sa.Integer(), nullable=False),
+        sa.Column("capacity", sa.Integer(), nullable=False),
+        sa.Column("load_percentage", sa.Float()),
+    )
+    op.create_index("ix_load_history_id", "load_history", ["id"])
+    op.create_index("ix_load_history_slot_id", "load_history", ["slot_id"])
+    op.create_index("ix_load_history_timestamp", "load_history", ["timestamp"])
+
+    op.create_table(
+        "predictions",
+        _id(),
+        sa.Column("slot_id", sa.Integer(), sa.ForeignKey("slots.id"), nullable=False),
+        sa.Column("predicted_wait_minutes", sa.Integer()),
+        sa.Column("congestion_score", sa.Float()),
+        sa.Column("confidence_score", sa.Float()),
+        sa.Column("algorithm_version", sa.String()),
+        _created_at(),
+    )
+    op.create_index("ix_predictions_id", "predictions", ["id"])
+    op.create_index("ix_predictions_slot_id", "predictions", ["slot_id"])
+
+    op.create_table(
+        "notifications",
+        _id(),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("is_read", sa.Boolean()),
+        _created_at(),
+    )
+    op.create_index("ix_notifications_id", "notifications", ["id"])
+    op.create_index("ix_notifications_user_id", "notifications", ["user_id"])
+
+    op.create_table(
+        "audit_logs",
+        _id(),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("entity_type", sa.String()),
+        sa.Column("entity_id", sa.Integer()),
+        sa.Column("details", sa.Text()),
+        sa.Column("ip_address", sa.String()),
+        _created_at(),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+    op.create_index("ix_audit_logs_created_at", "audit_logs", ["created_at"])
+
+
+def downgrade() -> None:
+    for table in (
+        "audit_logs", "notifications", "predictions", "load_history",
+        "counters", "appointments", "slots", "services", "users",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,36 @@
+"""Queue ordering key on appointments
+
+Queue positions are derived from (priority_weight DESC, id) instead of a
+stored queue_position, so each appointment keeps its booker's weight.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_column
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_column("appointments", "priority_weight"):
+        op.add_column("appointments", sa.Column("priority_weight", sa.Integer(), server_default="1"))
+        op.execute(
+            "UPDATE appointments SET priority_weight = "
+            "(SELECT COALESCE(users.priority_weight, 1) FROM users WHERE users.id = appointments.user_id)"
+        )
+    if has_column("appointments", "queue_position"):
+        with op.batch_alter_table("appointments") as batch_op:
+            batch_op.drop_column("queue_position")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.add_column(sa.Column("queue_position", sa.Integer()))
+        batch_op.drop_column("priority_weight")
@@ -0,0 +1,25 @@
+"""Guest names on group-booked appointments
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_column
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_column("appointments", "guest_name"):
+        op.add_column("appointments", sa.Column("guest_name", sa.String()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.drop_column("guest_name")
@@ -0,0 +1,37 @@
+"""Stored responses for Idempotency-Key replays
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_table
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if has_table("idempotency_records"):
+        return
+    op.create_table(
+        "idempotency_records",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=False),
+        sa.Column("response_body", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+    )
+    op.create_index("ix_idempotency_records_id", "idempotency_records", ["id"])
+    op.create_index("ix_idempotency_records_created_at", "idempotency_records", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("idempotency_records")
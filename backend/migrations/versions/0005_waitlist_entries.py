@@ -0,0 +1,40 @@
+"""Per-slot waitlist
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_table
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if has_table("waitlist_entries"):
+        return
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("slot_id", sa.Integer(), sa.ForeignKey("slots.id"), nullable=False),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("priority_weight", sa.Integer(), server_default="1"),
+        sa.Column("status", sa.String()),
+        sa.Column("appointment_id", sa.Integer(), sa.ForeignKey("appointments.id")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("promoted_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_waitlist_entries_id", "waitlist_entries", ["id"])
+    op.create_index("ix_waitlist_entries_user_id", "waitlist_entries", ["user_id"])
+    op.create_index("ix_waitlist_entries_slot_id", "waitlist_entries", ["slot_id"])
+    op.create_index("ix_waitlist_entries_status", "waitlist_entries", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_table("waitlist_entries")
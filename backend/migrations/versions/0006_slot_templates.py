@@ -0,0 +1,47 @@
+"""Slot templates and one slot per service, date and start time
+
+Duplicate slots must be removed before the unique constraint can be added;
+see DATABASE_SETUP.md.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_table, has_unique
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not has_unique("slots", "uq_slot_service_date_start"):
+        with op.batch_alter_table("slots") as batch_op:
+            batch_op.create_unique_constraint("uq_slot_service_date_start", ["service_id", "date", "start_time"])
+
+    if has_table("slot_templates"):
+        return
+    op.create_table(
+        "slot_templates",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+        sa.Column("weekday", sa.Integer()),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        sa.Column("capacity", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("service_id", "weekday", "start_time", name="uq_slot_template_service_weekday_start"),
+    )
+    op.create_index("ix_slot_templates_id", "slot_templates", ["id"])
+    op.create_index("ix_slot_templates_service_id", "slot_templates", ["service_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("slot_templates")
+    with op.batch_alter_table("slots") as batch_op:
+        batch_op.drop_constraint("uq_slot_service_date_start", type_="unique")
@@ -0,0 +1,38 @@
+"""Schedule exceptions for closures and capacity overrides
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from db.migrations import has_table
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if has_table("schedule_exceptions"):
+        return
+    op.create_table(
+        "schedule_exceptions",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id")),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("start_time", sa.Time()),
+        sa.Column("is_closed", sa.Boolean()),
+        sa.Column("capacity", sa.Integer()),
+        sa.Column("reason", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_schedule_exceptions_id", "schedule_exceptions", ["id"])
+    op.create_index("ix_schedule_exceptions_service_id", "schedule_exceptions", ["service_id"])
+    op.create_index("ix_schedule_exceptions_date", "schedule_exceptions", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_table("schedule_exceptions")
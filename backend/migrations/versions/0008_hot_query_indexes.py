@@ -0,0 +1,43 @@
+"""Composite indexes for the hot query shapes
+
+Adds composite indexes for the queue, my-bookings and latest-prediction
+reads. The single-column indexes they start with become redundant and are
+dropped; the composites are created first so MySQL foreign keys always
+have an index to use.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_appointments_slot_status_priority", "appointments", ["slot_id", "status", "priority_weight", "id"]
+    )
+    op.create_index("ix_appointments_user_created", "appointments", ["user_id", "created_at"])
+    op.create_index("ix_predictions_slot_created", "predictions", ["slot_id", "created_at"])
+
+    op.drop_index("ix_appointments_slot_id", table_name="appointments")
+    op.drop_index("ix_appointments_user_id", table_name="appointments")
+    op.drop_index("ix_predictions_slot_id", table_name="predictions")
+    # uq_slot_service_date_start starts with service_id
+    op.drop_index("ix_slots_service_id", table_name="slots")
+
+
+def downgrade() -> None:
+    op.create_index("ix_slots_service_id", "slots", ["service_id"])
+    op.create_index("ix_predictions_slot_id", "predictions", ["slot_id"])
+    op.create_index("ix_appointments_user_id", "appointments", ["user_id"])
+    op.create_index("ix_appointments_slot_id", "appointments", ["slot_id"])
+
+    op.drop_index("ix_predictions_slot_created", table_name="predictions")
+    op.drop_index("ix_appointments_user_created", table_name="appointments")
+    op.drop_index("ix_appointments_slot_status_priority", table_name="appointments")
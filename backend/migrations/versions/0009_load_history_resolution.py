@@ -0,0 +1,31 @@
+"""Load history resolution for sampling rollups
+
+Load samples are written as RAW rows and later compacted into HOURLY and
+DAILY rows. Existing rows become RAW.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "load_history",
+        sa.Column("resolution", sa.String(10), nullable=False, server_default="RAW"),
+    )
+    op.create_index("ix_load_history_resolution_timestamp", "load_history", ["resolution", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_load_history_resolution_timestamp", table_name="load_history")
+    with op.batch_alter_table("load_history") as batch_op:
+        batch_op.drop_column("resolution")
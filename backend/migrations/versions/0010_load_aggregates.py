@@ -0,0 +1,37 @@
+"""Per-(service, weekday, start time) load aggregates for prediction
+
+Holds the rolling WMA state so a prediction reads one row instead of
+joining and sorting load_history. Filled from load_history on the next
+startup, then kept current by the load sampler.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "load_aggregates",
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), primary_key=True),
+        sa.Column("weekday", sa.Integer(), primary_key=True),
+        sa.Column("start_time", sa.Time(), primary_key=True),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("load_sum", sa.Float(), nullable=False),
+        sa.Column("weighted_sum", sa.Float(), nullable=False),
+        sa.Column("window", sa.Text(), nullable=False),
+        sa.Column("last_date", sa.Date()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("load_aggregates")
@@ -0,0 +1,39 @@
+"""Selectable load predictors with streaming state
+
+Adds services.predictor (existing services keep the WMA) and the
+forecast_states table holding the EWMA / Holt / Holt-Winters models per
+(service, start time). States are filled from load_history on the next
+startup, then kept current by the load sampler.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "services",
+        sa.Column("predictor", sa.String(32), nullable=False, server_default="wma"),
+    )
+    op.create_table(
+        "forecast_states",
+        sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), primary_key=True),
+        sa.Column("start_time", sa.Time(), primary_key=True),
+        sa.Column("state", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("forecast_states")
+    with op.batch_alter_table("services") as batch_op:
+        batch_op.drop_column("predictor")
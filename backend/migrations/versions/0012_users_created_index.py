@@ -0,0 +1,21 @@
+"""Index for paging users in signup order
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_id", "users", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_created_id", table_name="users")
@@ -2,10 +2,10 @@
 Seed script to populate initial data for SmartQueue
 """
 from sqlalchemy.orm import Session
-from db.database import SessionLocal, engine, Base
-from db.models import Service, User, Slot
+from db.database import SessionLocal
+from db.migrations import upgrade_database
+from db.models import Service, User
 from core.security import get_password_hash
-from datetime import datetime, timedelta, time
 
 def seed_services(db: Session):
     """Create initial services"""
@@ -104,63 +104,12 @@ def seed_demo_user(db: Session):
     db.commit()
     print("[OK] Created demo user (email: demo@smartqueue.com, password: demo123)")
 
-def seed_slots(db: Session):
-    """Create time slots for services"""
-    # Check if slots already exist
-    existing_slots = db.query(Slot).count()
-    if existing_slots > 0:
-        print(f"Slots already exist ({existing_slots} slots found). Skipping seed.")
-        return
-    
-    # Get all services
-    services = db.query(Service).all()
-    if not services:
-        print("No services found. Please seed services first.")
-        return
-    
-    # Create slots for next 7 days
-    today = datetime.now().date()
-    time_slots = [
-        ("09:00", "09:30"),
-        ("09:30", "10:00"),
-        ("10:00", "10:30"),
-        ("10:30", "11:00"),
-        ("11:00", "11:30"),
-        ("11:30", "12:00"),
-        ("14:00", "14:30"),
-        ("14:30", "15:00"),
-        ("15:00", "15:30"),
-        ("15:30", "16:00"),
-        ("16:00", "16:30"),
-        ("16:30", "17:00"),
-    ]
-    
-    slots_created = 0
-    for service in services:
-        for day_offset in range(7):  # Next 7 days
-            slot_date = today + timedelta(days=day_offset)
-            for start_str, end_str in time_slots:
-                slot = Slot(
-                    service_id=service.id,
-                    date=slot_date,
-                    start_time=start_str,
-                    end_time=end_str,
-                    capacity=10,
-                    booked_count=0,
-                    status="AVAILABLE"
-                )
-                db.add(slot)
-                slots_created += 1
-    
-    db.commit()
-    print(f"[OK] Created {slots_created} time slots for {len(services)} services")
-
 def main():
     """Run all seed functions"""
     print("Starting database seeding...")
     
     # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    upgrade_database()
     
     # Create database session
     db = SessionLocal()
@@ -169,7 +118,6 @@ def main():
         seed_admin_user(db)
         seed_demo_user(db)
         seed_services(db)
-        seed_slots(db)
         print("\n[SUCCESS] Database seeding completed successfully!")
     except Exception as e:
         print(f"\n[ERROR] Error during seeding: {e}")